@@ -0,0 +1,258 @@
+import threading
+
+from todo_mysql import MySQLOutbox, SyncBatch, merge_fields, outbox_records, push_task_changes
+from todo_store import Task
+
+
+class FakeServer:
+    """The tasks and task_tombstones tables, with updated_at as a ticking clock"""
+
+    def __init__(self):
+        self.rows = {}        # task_uid -> [name, iso_date, priority, row_version, updated_at]
+        self.tombstones = {}  # task_uid -> deleted_at
+        self.clock = 1000.0
+
+    def tick(self):
+        self.clock += 1
+        return self.clock
+
+    def task(self, task_uid):
+        name, iso_date, priority, version, _ = self.rows[task_uid]
+        return version, Task.from_iso(name, iso_date, priority, task_uid)
+
+    def peer_update(self, task_uid, **values):
+        """Another client's write to a row"""
+        row = self.rows[task_uid]
+        for field, value in values.items():
+            row[("name", "iso_date", "priority").index(field)] = value
+        row[3] += 1
+        row[4] = self.tick()
+
+
+class FakeCursor:
+    """Just enough of a MySQL cursor for the statements push_task_changes sends"""
+
+    def __init__(self, server):
+        self.server = server
+        self.rowcount = 0
+        self.results = []
+
+    def execute(self, sql, params=()):
+        server = self.server
+        now = server.tick()
+        self.rowcount, self.results = 0, []
+        if sql.startswith("SELECT task_uid FROM tasks WHERE task_uid IN"):
+            self.results = [(task_uid,) for task_uid in params if task_uid in server.rows]
+        elif sql.startswith("SELECT @@max_allowed_packet"):
+            self.results = [(1 << 20,)]
+        elif sql.startswith("INSERT INTO tasks (task_uid, task_name, due_date, priority) VALUES"):
+            for i in range(0, len(params), 4):
+                task_uid, name, iso_date, priority = params[i:i + 4]
+                server.rows[task_uid] = [name, iso_date, priority, 1, now]
+        elif sql.startswith("INSERT INTO tasks (task_uid, task_name, due_date, priority, row_version)"):
+            task_uid, name, iso_date, priority, version = params
+            server.rows[task_uid] = [name, iso_date, priority, version, now]
+        elif sql.startswith("UPDATE tasks SET"):
+            name, iso_date, priority, task_uid, version = params
+            row = server.rows.get(task_uid)
+            if row is not None and row[3] == version:
+                server.rows[task_uid] = [name, iso_date, priority, version + 1, now]
+                self.rowcount = 1
+        elif sql.startswith("SELECT task_name, due_date, priority, row_version"):
+            row = server.rows.get(params[0])
+            self.results = [tuple(row)] if row is not None else []
+        elif sql.startswith("SELECT UNIX_TIMESTAMP(deleted_at)"):
+            if params[0] in server.tombstones:
+                self.results = [(server.tombstones[params[0]],)]
+        elif sql.startswith("DELETE FROM tasks WHERE task_uid = %s AND row_version = %s"):
+            row = server.rows.get(params[0])
+            if row is not None and row[3] == params[1]:
+                del server.rows[params[0]]
+                self.rowcount = 1
+        elif sql.startswith("DELETE FROM tasks WHERE task_uid = %s"):
+            if server.rows.pop(params[0], None) is not None:
+                self.rowcount = 1
+        elif sql.startswith("INSERT INTO task_tombstones"):
+            for task_uid in params:
+                server.tombstones[task_uid] = now
+        elif sql.startswith("DELETE FROM task_tombstones"):
+            server.tombstones.pop(params[0], None)
+        else:
+            raise AssertionError(f"Unexpected statement: {sql}")
+
+    def fetchone(self):
+        return self.results[0] if self.results else None
+
+    def fetchall(self):
+        return self.results
+
+
+class Client:
+    """Queues records with the base the Tk thread knows and pushes them like MySQLSyncWorker"""
+
+    def __init__(self, server):
+        self.server = server
+        self.base = {}        # what on_mysql_pushed has applied so far
+        self.committed = {}   # the worker's own writes
+        self.outbox = []
+        self.conflicts = []
+
+    def queue(self, upserts=(), removed=()):
+        self.outbox.extend(outbox_records(None, list(upserts), list(removed), self.base, 1))
+
+    def push(self, records):
+        batch = SyncBatch(self.committed)
+        for record in records:
+            batch.add_record(record)
+        results, overruled = push_task_changes(FakeCursor(self.server), batch.upserts, batch.removes,
+                                               lambda *conflict: self.conflicts.append(conflict))
+        for task_uid, result in results.items():
+            if result is None:
+                self.committed.pop(task_uid, None)
+            else:
+                self.committed[task_uid] = result
+        return results, overruled
+
+    def push_next(self, made_at=None):
+        record = self.outbox.pop(0)
+        if made_at is not None:
+            record["at"] = made_at
+        return self.push([record])
+
+
+def test_merge_fields_keeps_one_sided_changes_without_conflicts():
+    base = Task.from_iso("Write report", "2026-10-20", 1)
+    local = Task.from_iso("Write final report", "2026-10-20", 1, base.task_id)
+    server = Task.from_iso("Write report", "2026-10-20", 3, base.task_id)
+
+    merged, conflicts = merge_fields(local, base, server, 0, 100)
+
+    assert (merged.name, merged.priority) == ("Write final report", 3)
+    assert conflicts == []
+
+
+def test_merge_fields_later_writer_wins_a_field_changed_on_both_sides():
+    base = Task.from_iso("Write report", "2026-10-20", 1)
+    local = Task.from_iso("Mine", "2026-10-20", 1, base.task_id)
+    server = Task.from_iso("Theirs", "2026-10-20", 1, base.task_id)
+
+    assert merge_fields(local, base, server, 50, 100)[0].name == "Theirs"
+    merged, conflicts = merge_fields(local, base, server, 100, 100)
+    assert merged.name == "Mine"
+    assert conflicts == [("name", "Mine", "Theirs", "Mine")]
+
+
+def test_second_rename_during_a_push_uses_the_version_this_client_wrote():
+    server = FakeServer()
+    client = Client(server)
+    task = Task.from_iso("Draft", "2026-10-20", 1)
+    client.queue(upserts=[task])
+    client.push_next()
+    client.base = dict(client.committed)
+
+    first = Task.from_iso("Draft v2", "2026-10-20", 1, task.task_id)
+    second = Task.from_iso("Draft v3", "2026-10-20", 1, task.task_id)
+    client.queue(upserts=[first])
+    client.queue(upserts=[second])
+    client.push_next()
+    results, overruled = client.push_next(made_at=0)
+
+    assert server.task(task.task_id) == (3, second)
+    assert results[task.task_id] == (3, second)
+    assert overruled == set()
+    assert client.conflicts == []
+
+
+def test_edit_after_add_updates_the_row_this_client_inserted():
+    server = FakeServer()
+    client = Client(server)
+    task = Task.from_iso("Call dentist", "2026-10-20", 1)
+    edited = Task.from_iso("Call dentist", "2026-10-21", 2, task.task_id)
+    client.queue(upserts=[task])
+    client.queue(upserts=[edited])
+    client.push_next()
+    results, overruled = client.push_next(made_at=0)
+
+    assert server.task(task.task_id) == (2, edited)
+    assert overruled == set()
+    assert client.conflicts == []
+
+
+def test_finish_after_edit_deletes_the_row_instead_of_restoring_it():
+    server = FakeServer()
+    client = Client(server)
+    task = Task.from_iso("Pay rent", "2026-10-20", 1)
+    client.queue(upserts=[task])
+    client.push_next()
+    client.base = dict(client.committed)
+
+    edited = Task.from_iso("Pay rent", "2026-10-20", 3, task.task_id)
+    client.queue(upserts=[edited])
+    client.queue(removed=[task.task_id])
+    client.push_next()
+    results, overruled = client.push_next(made_at=0)
+
+    assert task.task_id not in server.rows
+    assert task.task_id in server.tombstones
+    assert results[task.task_id] is None
+    assert overruled == set()
+    assert client.conflicts == []
+
+
+def test_another_clients_edit_is_still_merged():
+    server = FakeServer()
+    client = Client(server)
+    task = Task.from_iso("Plan trip", "2026-10-20", 1)
+    client.queue(upserts=[task])
+    client.push_next()
+    client.base = dict(client.committed)
+
+    first = Task.from_iso("Plan trip to Oslo", "2026-10-20", 1, task.task_id)
+    client.queue(upserts=[first])
+    client.push_next()
+    server.peer_update(task.task_id, priority=5)
+    second = Task.from_iso("Plan trip to Bergen", "2026-10-20", 1, task.task_id)
+    client.queue(upserts=[second])
+    client.push_next()
+
+    version, merged = server.task(task.task_id)
+    assert (version, merged.name, merged.priority) == (4, "Plan trip to Bergen", 5)
+    assert client.conflicts == []
+
+
+def test_outbox_replays_records_after_a_torn_append(tmp_path):
+    path = tmp_path / "outbox.jsonl"
+    outbox = MySQLOutbox(str(path), threading.RLock())
+    first = Task.from_iso("Water plants", "2026-10-20", 1)
+    second = Task.from_iso("Buy milk", "2026-10-21", 2)
+    outbox.append(outbox_records(["Stretch"], [first], [], {}, 1))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "upsert", "ta')    # the app died mid-append
+    outbox.append(outbox_records(None, [second], [], {}, 2))
+
+    reopened = MySQLOutbox(str(path), threading.RLock())
+    records = reopened.read()
+    assert reopened.depth == 3
+    batch = SyncBatch()
+    for record in records:
+        batch.add_record(record)
+    assert set(batch.upserts) == {first.task_id, second.task_id}
+    assert batch.daily_tasks == ["Stretch"]
+    assert batch.round == 2
+
+    reopened.acknowledge(batch.record_ids[:2])
+    assert [record["task"][3] for record in reopened.read()] == [second.task_id]
+    assert reopened.depth == 1
+
+
+def test_sync_batch_keeps_the_oldest_base_of_a_task():
+    task = Task.from_iso("Renew passport", "2026-10-20", 1)
+    edited = Task.from_iso("Renew passport", "2026-11-01", 1, task.task_id)
+    records = (outbox_records(None, [edited], [], {task.task_id: (4, task)}, 1)
+               + outbox_records(None, [], [task.task_id], {task.task_id: (5, edited)}, 2))
+    batch = SyncBatch()
+    for record in records:
+        batch.add_record(record)
+
+    assert batch.upserts == {}
+    assert batch.removes[task.task_id][0] == (4, task)
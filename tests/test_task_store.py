@@ -0,0 +1,55 @@
+import os
+
+from todo_store import JournaledTaskStore, Task, TaskStore
+
+
+def names(store):
+    return sorted(task.name for task in store.tasks)
+
+
+def test_journal_torn_tail_is_discarded_and_complete_records_kept(tmp_path):
+    path = str(tmp_path / "tasks.txt")
+    store = JournaledTaskStore(path)
+    store.add(Task.from_iso("Water plants", "2026-10-20", 1))
+    store.add(Task.from_iso("Buy milk", "2026-10-21", 2))
+    intact = os.path.getsize(store.journal_path)
+    with open(store.journal_path, "ab") as f:
+        f.write(b'{"op":"add","task":["Half wri')    # the app died mid-append
+
+    reopened = JournaledTaskStore(path)
+
+    assert names(reopened) == ["Buy milk", "Water plants"]
+    assert os.path.getsize(reopened.journal_path) == intact
+    reopened.add(Task.from_iso("Call dentist", "2026-10-22", 3))
+    assert names(JournaledTaskStore(path)) == ["Buy milk", "Call dentist", "Water plants"]
+
+
+def test_reload_keeps_local_edits_and_takes_other_instances_changes(tmp_path):
+    path = str(tmp_path / "tasks.txt")
+    mine = TaskStore(path)
+    kept = mine.add(Task.from_iso("Kept", "2026-10-20", 1))
+    theirs_only = mine.add(Task.from_iso("Theirs only", "2026-10-20", 1))
+    mine_only = mine.add(Task.from_iso("Mine only", "2026-10-20", 1))
+    both = mine.add(Task.from_iso("Both", "2026-10-20", 1))
+
+    other = TaskStore(path)
+    pending = []
+    mine.defer_save = pending.append
+
+    # This instance edits two tasks in memory; its save is still pending
+    mine.update(Task.from_iso("Mine only", "2026-10-20", 5, mine_only.task_id))
+    mine.update(Task.from_iso("Both (mine)", "2026-10-20", 1, both.task_id))
+    # Meanwhile another instance writes its own edits and a new task
+    other.update(Task.from_iso("Theirs only (edited)", "2026-10-20", 1, theirs_only.task_id))
+    other.update(Task.from_iso("Both (theirs)", "2026-10-20", 1, both.task_id))
+    added = other.add(Task.from_iso("Added elsewhere", "2026-10-21", 2))
+
+    for save in pending:
+        save()
+
+    merged = {task.task_id: task for task in TaskStore(path).tasks}
+    assert merged[kept.task_id].name == "Kept"
+    assert merged[theirs_only.task_id].name == "Theirs only (edited)"
+    assert merged[mine_only.task_id].priority == 5
+    assert merged[both.task_id].name == "Both (mine)"
+    assert merged[added.task_id].name == "Added elsewhere"
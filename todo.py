@@ -4,6 +4,7 @@ import re
 import tkinter as tk
 import requests
 import threading
+import time
 from tkinter.scrolledtext import ScrolledText
 from tkinter import ttk, messagebox, simpledialog, filedialog
 from tkcalendar import DateEntry
@@ -19,6 +20,12 @@ import mysql.connector
 import socket
 import base64
 import keyring
+from todo_store import Task, TaskStore, JournaledTaskStore, SQLiteTaskStore, FileLock, atomic_write
+from todo_view import TaskListView
+from todo_persist import PersistScheduler
+from todo_cache import FileCache
+from todo_watch import FileWatcher
+from todo_mysql import MySQLPool, MySQLOutbox, MySQLSyncWorker, MySQLHealthMonitor, MYSQL_PROBE_TIMEOUT
 
 if getattr(sys, "frozen", False):
     base_path = sys._MEIPASS
@@ -31,17 +38,67 @@ TODO_FILE = str(Path.home()) + "/TODOapp/todo.txt"
 CHARACTER_FILE = str(Path.home()) + "/TODOapp/character.txt"
 VERSION_FILE = str(Path.home()) + "/TODOapp/version.txt"
 MYSQL_CONFIG_FILE = str(Path.home()) + "/TODOapp/mysql_config.json"
+TODO_DB_FILE = str(Path.home()) + "/TODOapp/todo.db"
+STORAGE_BACKEND_FILE = str(Path.home()) + "/TODOapp/storage_backend.txt"
+DATA_LOCK_FILE = str(Path.home()) + "/TODOapp/.lock"
+MYSQL_OUTBOX_FILE = str(Path.home()) + "/TODOapp/mysql_outbox.jsonl"
+MYSQL_BASE_FILE = str(Path.home()) + "/TODOapp/mysql_base.json"
+MYSQL_CONFLICT_LOG = str(Path.home()) + "/TODOapp/mysql_conflicts.log"
+TREE_ROW_HEIGHT = 25
+
+# How many tasks per category are included in the AI prompt
+AI_CONTEXT_TASKS = 10
+
+# Quiet period before dirty files are written, and the longest a write is held back
+PERSIST_DELAY_MS = 500
+PERSIST_MAX_DELAY_MS = 3000
+
+# How often rows other clients changed are pulled from MySQL
+MYSQL_PULL_INTERVAL_MS = 5000
+# How often a MySQL toggle waiting on its status probe checks back
+MYSQL_STATUS_POLL_MS = 200
+
+# Longest single wait of the status refresh timer, as a guard against clock changes
+MAX_REFRESH_DELAY_MS = 60 * 60 * 1000
+
+
+def parse_text(text):
+    return text.strip()
+
+
+def parse_lines(text):
+    """Non-empty stripped lines, as a tuple"""
+    return tuple(line.strip() for line in text.splitlines() if line.strip())
+
+
+def parse_character(text):
+    """(level, tasks completed) from character.txt, or None if malformed"""
+    parts = text.strip().split(" | ")
+    if len(parts) == 2:
+        return int(parts[0]), int(parts[1])
+    return None
+
+
+# Task storage backends selectable from the Options menu
+STORAGE_BACKENDS = {
+    "text": ("Plain Text File", TaskStore, TODO_FILE),
+    "journal": ("Journaled (Append-Only Log)", JournaledTaskStore, TODO_FILE),
+    "sqlite": ("SQLite Database", SQLiteTaskStore, TODO_DB_FILE),
+}
 
 class TodoApp:
     def __init__(self, root):
         self.root = root
         self.root.title("TODO App")
         self.root.state('zoomed')
+
+        # Parsed small data files, re-read only when they change on disk
+        self.file_cache = FileCache()
         
         # Configure styles
         self.style = ttk.Style()
         self.style.configure("Treeview.Heading", font=('Helvetica', 10, 'bold'))
-        self.style.configure("Treeview", rowheight=25)
+        self.style.configure("Treeview", rowheight=TREE_ROW_HEIGHT)
         
         # Character stats
         self.level = 0
@@ -68,11 +125,49 @@ class TodoApp:
             'password': '',
             'database': 'todoapp'
         }
+        self.mysql_pool = None
+        self.mysql_pool_lock = threading.Lock()  # the health monitor and sync worker ask for it too
+        # The shared tables' contents are unknown until the first push of the session
+        self.mysql_needs_full_push = True
         self.load_mysql_config()
+
+        # Serialize data file access with any other running instance
+        self.data_lock = FileLock(DATA_LOCK_FILE)
+
+        # Coalesce file writes; everything pending is flushed on close
+        self.persistence = PersistScheduler(self.root, PERSIST_DELAY_MS, PERSIST_MAX_DELAY_MS,
+                                            lock=self.data_lock)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Load tasks once; all reads are served from memory afterwards
+        self.storage_backend = tk.StringVar(value="text")
+        self.load_storage_backend()
+        self.task_store = self.create_task_store(self.storage_backend.get())
         
         # Create widgets
         self.create_widgets()
 
+        # MySQL status is probed in the background and read from this cache
+        self.mysql_health = MySQLHealthMonitor(self.root, self.check_mysql_status, self.on_mysql_status_changed)
+        self.mysql_health.active = self.mysql_enabled.get()
+        if self.mysql_health.active:
+            self.mysql_health.refresh()
+
+        # Changes go to MySQL on a background thread so a slow server never blocks the window;
+        # they wait in an on-disk outbox until the server has them
+        self.mysql_sync_error = None  # why the last sync failed, until one succeeds
+        self.mysql_sync = MySQLSyncWorker(self.root, MySQLOutbox(MYSQL_OUTBOX_FILE, self.data_lock),
+                                          MYSQL_CONFLICT_LOG, self.on_mysql_sync_state,
+                                          self.on_mysql_pushed, self.apply_mysql_pull,
+                                          self.on_mysql_migrated, self.mysql_health)
+        self.mysql_sync.set_enabled(self.mysql_enabled.get())
+        self.mysql_enabled.trace_add("write", lambda *args: self.mysql_sync.set_enabled(self.mysql_enabled.get()))
+
+        # Version and values of each task as last seen on the server, for compare-and-swap,
+        # and the newest updated_at seen so far, which peers' changes are pulled from
+        self.mysql_base = self.load_mysql_base()
+        self.mysql_pull_timer = self.root.after(MYSQL_PULL_INTERVAL_MS, self.sync_tasks_from_mysql)
+
         self.main_pane = ttk.Panedwindow(self.root, orient=tk.HORIZONTAL)
         self.main_pane.pack(fill=tk.BOTH, expand=True)
 
@@ -101,16 +196,17 @@ class TodoApp:
 
         # Add to your existing init
         self.last_refresh_date = datetime.now().date()
+        self.refresh_timer = None
         
         # Start the auto-refresh timer after initializing the UI
         self.start_auto_refresh()
 
+        # Pick up changes other running instances make to the data files
+        self.file_watcher = FileWatcher(self.root, self.on_data_file_changed)
+        self.watch_data_files()
+
     def load_app_version(self):
-        try:
-            with open(VERSION_FILE, "r") as f:
-                return f.read().strip()
-        except FileNotFoundError:
-            return "0.0.0 (dev)"
+        return self.file_cache.load(VERSION_FILE, parse_text, "0.0.0 (dev)")
 
     def update_mysql_menu_state(self):
         """Update menu items based on MySQL enabled status"""
@@ -185,11 +281,20 @@ class TodoApp:
         self.todo_frame.pack(fill=tk.BOTH, padx=10, pady=(10, 0), expand=True)
 
        # Task list inside its frame
-        self.tree = ttk.Treeview(self.todo_frame, columns=("Task", "Due Date", "Priority"), show="headings")
+        tree_frame = ttk.Frame(self.todo_frame)
+        tree_frame.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=("Task", "Due Date", "Priority"), show="headings")
         for col, width in [("Task", 350), ("Due Date", 250), ("Priority", 200)]:
             self.tree.heading(col, text=col, command=lambda c=col: self.sort_column(c, False))
             self.tree.column(col, width=width, minwidth=40 if col=="Priority" else 80, stretch=(col=="Task"))
-        self.tree.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
+        tree_scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL)
+        tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tree.tag_configure("overdue", foreground="red")
+        self.tree.tag_configure("today", foreground="orange")
+
+        # Long lists switch to a virtualized view that only builds the visible rows
+        self.task_view = TaskListView(self.tree, tree_scrollbar, TREE_ROW_HEIGHT)
 
         # Controls frame INSIDE the To Do List frame
         control_frame = ttk.Frame(self.todo_frame)
@@ -253,36 +358,30 @@ class TodoApp:
         self.root.after(1000, self.update_time)  # Update every second
 
     def sort_column(self, column, reverse):
-        # Get current tasks
-        tasks = [(self.tree.set(child, column), child) for child in self.tree.get_children('')]
-        
-        # Custom sorting
-        if column == "Due Date":
-            tasks.sort(key=lambda x: datetime.strptime(x[0], "%m-%d-%Y"), reverse=reverse)
-        elif column == "Priority":
-            tasks.sort(key=lambda x: int(x[0]), reverse=reverse)
-        else:
-            tasks.sort(reverse=reverse)
+        # The task store sorts on precomputed keys and caches the order per
+        # column and direction, so toggling a header does not re-sort
+        ordered = self.task_store.sorted_by(column, reverse)
 
-        # Rearrange items in sorted positions
-        for index, (val, child) in enumerate(tasks):
-            self.tree.move(child, '', index)
+        # Only the rows whose position changed are moved
+        today_ordinal = datetime.now().date().toordinal()
+        self.task_view.set_rows(self.task_rows(
+            (task, self.task_tags(task, today_ordinal)) for task in ordered
+        ))
 
         # Reverse sort next time
         self.tree.heading(column, command=lambda: self.sort_column(column, not reverse))
 
     def load_character(self):
-        if os.path.exists(CHARACTER_FILE):
-            with open(CHARACTER_FILE, "r") as f:
-                parts = f.read().strip().split(" | ")
-                if len(parts) == 2:
-                    self.level = int(parts[0])
-                    self.tasks_completed = int(parts[1])
+        character = self.file_cache.load(CHARACTER_FILE, parse_character)
+        if character is not None:
+            self.level, self.tasks_completed = character
         self.update_character_labels()
 
     def save_character(self):
-        with open(CHARACTER_FILE, "w") as f:
-            f.write(f"{self.level} | {self.tasks_completed}")
+        self.persistence.schedule(CHARACTER_FILE, self.write_character)
+
+    def write_character(self):
+        atomic_write(CHARACTER_FILE, f"{self.level} | {self.tasks_completed}")
 
     def update_character_labels(self):
         self.level_label.config(text=str(self.level))
@@ -352,80 +451,65 @@ class TodoApp:
         ttk.Button(dialog, text="Add", command=validate_and_add).grid(row=3, columnspan=2, pady=10)
 
     def add_task(self, task, date, priority):
-        tasks = self.load_tasks()
-        tasks.append((task, date, priority))
-        tasks = sorted(tasks, key=lambda x: (datetime.strptime(x[1], "%m-%d-%Y"), -int(x[2])))
-        self.save_tasks(tasks)
+        self.task_store.add(Task(task, date, priority))
+        self.after_tasks_changed()
         self.refresh_task_list()
 
-    def remove_task(self):
-        selected = self.tree.selection()
+    def selected_task(self):
+        """Return the task selected in the list (even if scrolled out of view), or None"""
+        selected = self.task_view.selection()
         if not selected:
+            return None
+        return self.task_store.get(selected[0])
+
+    def remove_task(self):
+        task_to_remove = self.selected_task()
+        if task_to_remove is None:
             messagebox.showwarning("Warning", "Please select a task to remove")
             return
         
-        task_values = self.tree.item(selected[0], 'values')
-        task_to_remove = (task_values[0], task_values[1], task_values[2])
-        
-        tasks = self.load_tasks()
         try:
-            index = tasks.index(task_to_remove)
+            self.task_store.remove(task_to_remove)
         except ValueError:
             messagebox.showerror("Error", "Task not found in data file")
             return
         
-        tasks = self.load_tasks()
-        if 0 <= index < len(tasks):
-            del tasks[index]
-            self.tasks_completed += 1
-            if self.tasks_completed % 5 == 0:
-                self.level += 1
-            self.save_character()
-            self.update_character_labels()
-            self.save_tasks(tasks)
-            self.refresh_task_list()
+        self.tasks_completed += 1
+        if self.tasks_completed % 5 == 0:
+            self.level += 1
+        self.save_character()
+        self.update_character_labels()
+        self.after_tasks_changed()
+        self.refresh_task_list()
         
     def edit_task(self):
-        selected = self.tree.selection()
-        if not selected:
+        task_to_edit = self.selected_task()
+        if task_to_edit is None:
             messagebox.showwarning("Warning", "Please select a task to edit")
             return
-        
-        task_values = self.tree.item(selected[0], 'values')
-        task_to_edit = (task_values[0], task_values[1], task_values[2])
 
-        tasks = self.load_tasks()
-        try:
-            # Find the index by content instead of Treeview position
-            index = tasks.index(task_to_edit)
-        except ValueError:
-            messagebox.showerror("Error", "Task not found in data file")
-            return
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Edit Task")
+        
+        ttk.Label(dialog, text="Task:").grid(row=0, column=0, padx=5, pady=5)
+        task_entry = ttk.Entry(dialog, width=40)
+        task_entry.grid(row=0, column=1, padx=5, pady=5)
+        task_entry.insert(0, task_to_edit.name)
+        
+        ttk.Label(dialog, text="Due Date:").grid(row=1, column=0, padx=5, pady=5)
+        date_entry = DateEntry(dialog,
+                             date_pattern="mm-dd-yyyy",
+                             background="darkblue", 
+                             foreground="white",
+                             borderwidth=2)
+        date_entry.grid(row=1, column=1, padx=5, pady=5)
+        date_entry.set_date(datetime.fromordinal(task_to_edit.due_ordinal))
+        
+        ttk.Label(dialog, text="Priority (1-5):").grid(row=2, column=0, padx=5, pady=5)
+        priority_entry = ttk.Spinbox(dialog, from_=1, to=5)
+        priority_entry.grid(row=2, column=1, padx=5, pady=5)
+        priority_entry.insert(0, task_to_edit.priority)
         
-        tasks = self.load_tasks()
-        if 0 <= index < len(tasks):
-            dialog = tk.Toplevel(self.root)
-            dialog.title("Edit Task")
-            
-            ttk.Label(dialog, text="Task:").grid(row=0, column=0, padx=5, pady=5)
-            task_entry = ttk.Entry(dialog, width=40)
-            task_entry.grid(row=0, column=1, padx=5, pady=5)
-            task_entry.insert(0, tasks[index][0])
-            
-            ttk.Label(dialog, text="Due Date:").grid(row=1, column=0, padx=5, pady=5)
-            date_entry = DateEntry(dialog,
-                                 date_pattern="mm-dd-yyyy",
-                                 background="darkblue", 
-                                 foreground="white",
-                                 borderwidth=2)
-            date_entry.grid(row=1, column=1, padx=5, pady=5)
-            date_entry.set_date(datetime.strptime(tasks[index][1], "%m-%d-%Y"))
-            
-            ttk.Label(dialog, text="Priority (1-5):").grid(row=2, column=0, padx=5, pady=5)
-            priority_entry = ttk.Spinbox(dialog, from_=1, to=5)
-            priority_entry.grid(row=2, column=1, padx=5, pady=5)
-            priority_entry.insert(0, tasks[index][2])
-            
         def validate_and_edit():
             date = self.parse_date(date_entry.get())
             if not date:
@@ -440,101 +524,79 @@ class TodoApp:
                 messagebox.showerror("Error", "Priority must be 1-5")
                 return
             
-            tasks[index] = (task_entry.get(), date, priority)
-            self.save_tasks(tasks)
+            try:
+                self.task_store.update(Task(task_entry.get(), date, priority,
+                                            task_id=task_to_edit.task_id))
+            except ValueError:
+                messagebox.showerror("Error", "Task not found in data file")
+                return
+            self.after_tasks_changed()
             self.refresh_task_list()
             dialog.destroy()
             
         ttk.Button(dialog, text="Save", command=validate_and_edit).grid(row=3, columnspan=2, pady=10)
 
     def delete_task(self):
-        selected = self.tree.selection()
-        if not selected:
+        task_to_remove = self.selected_task()
+        if task_to_remove is None:
             messagebox.showwarning("Warning", "Please select a task to delete")
             return
         
-        task_values = self.tree.item(selected[0], 'values')
-        task_to_remove = (task_values[0], task_values[1], task_values[2])
-        
-        tasks = self.load_tasks()
         try:
-            index = tasks.index(task_to_remove)
+            self.task_store.remove(task_to_remove)
         except ValueError:
             messagebox.showerror("Error", "Task not found in data file")
             return
         
-        tasks = self.load_tasks()
-        if 0 <= index < len(tasks):
-            del tasks[index]
-            self.save_tasks(tasks)
-            self.refresh_task_list()        
-        else:
-            messagebox.showerror("Error", "Invalid task index")
+        self.after_tasks_changed()
+        self.refresh_task_list()
 
     def refresh_task_list(self):
-        """Modified refresh_task_list method"""
-        self.tree.delete(*self.tree.get_children())  # Clear existing tasks
-        tasks = self.load_tasks()  # Load tasks from file
-        current_datetime = datetime.now()
-        today = current_datetime.date()
-        
-        # Categorize tasks
-        overdue_tasks = []
-        today_tasks = []
-        upcoming_tasks = []
-
-        for task in tasks:
-            task_name, due_date_str, priority = task
-            due_date = datetime.strptime(due_date_str, "%m-%d-%Y").date()
-
-            if due_date < today:
-                overdue_tasks.append(task)  # Overdue tasks
-            elif due_date == today:
-                today_tasks.append(task)  # Due today
-            else:
-                upcoming_tasks.append(task)  # Future tasks
-
-        # Sort each category
-        overdue_tasks.sort(key=lambda x: (datetime.strptime(x[1], "%m-%d-%Y"), -int(x[2])))  # Earliest first
-        today_tasks.sort(key=lambda x: int(x[2]), reverse=True)  # Sort by priority (higher first)
-        upcoming_tasks.sort(key=lambda x: (datetime.strptime(x[1], "%m-%d-%Y"), -int(x[2])))  # Earliest first
-
-        # Insert into Treeview with colors
-        for task in overdue_tasks:
-            self.tree.insert("", tk.END, values=task, tags=("overdue",), text=task[0])
-        for task in today_tasks:
-            self.tree.insert("", tk.END, values=task, tags=("today",), text=task[0])
-        for task in upcoming_tasks:
-            self.tree.insert("", tk.END, values=task, text=task[0])
-
-        # Configure row colors - moved outside the loop for efficiency
-        self.tree.tag_configure("overdue", foreground="red")
-        self.tree.tag_configure("today", foreground="orange")
+        """Bring the Treeview in line with the task store, touching only changed rows"""
+        today = datetime.now().date()
+        
+        # Categorize tasks; each category comes back already sorted
+        # (earliest first, or higher priority first for today's tasks)
+        overdue_tasks, today_tasks, upcoming_tasks = self.task_store.categorized(today)
+
+        rows = [(task, ("overdue",)) for task in overdue_tasks]
+        rows += [(task, ("today",)) for task in today_tasks]
+        rows += [(task, ()) for task in upcoming_tasks]
+        self.task_view.set_rows(self.task_rows(rows))
 
         # Update the remaining tasks count
-        self.remaining_label.config(text=str(len(self.tree.get_children())))
+        self.remaining_label.config(text=str(len(rows)))
+
+    def task_tags(self, task, today_ordinal):
+        """Row color tags for a task relative to today"""
+        if task.due_ordinal < today_ordinal:
+            return ("overdue",)
+        if task.due_ordinal == today_ordinal:
+            return ("today",)
+        return ()
+
+    def task_rows(self, tasks_with_tags):
+        """Turn (task, tags) pairs into keyed Treeview rows for the reconciler"""
+        return [(task.task_id, task.values(), tags) for task, tags in tasks_with_tags]
 
     def load_tasks(self):
-        if not os.path.exists(TODO_FILE):
-            return []
-        with open(TODO_FILE, "r") as f:
-            tasks = []
-            for line in f.readlines():
-                parts = line.strip().split(" | ")
-                if len(parts) == 3:
-                    tasks.append((parts[0], parts[1], parts[2]))
-            return sorted(tasks, key=lambda x: (datetime.strptime(x[1], "%m-%d-%Y"), -int(x[2])))
+        """Return the tasks held by the in-memory store (no file access)"""
+        return self.task_store.all()
 
     def save_tasks(self, tasks, skip_mysql=False):
         """Modified to respect storage preference and sync to MySQL if enabled"""
-        with open(TODO_FILE, "w") as f:
-            for task in tasks:
-                f.write(" | ".join(str(x) for x in task) + "\n")
-    
+        self.task_store.set_tasks(tasks)
+        self.after_tasks_changed(skip_mysql)
+
+    def after_tasks_changed(self, skip_mysql=False):
+        """Run side effects after the task store was mutated"""
         # Sync to MySQL if enabled and not skipping
         if self.mysql_enabled.get() and not skip_mysql:
             self.sync_tasks_to_mysql()
 
+        # The next category change may have moved
+        self.start_auto_refresh()
+
     def update_chat_history(self, message):
         self.chat_history.config(state='normal')
         self.chat_history.insert(tk.END, message + "\n")
@@ -562,9 +624,21 @@ class TodoApp:
         self.send_button.config(state='disabled')
         
         # Start processing in a separate thread
-        threading.Thread(target=self.get_ai_response, args=(user_text, thinking_index)).start()
-
-    def get_ai_response(self, prompt, thinking_index):
+        task_context = self.build_task_context()
+        threading.Thread(target=self.get_ai_response, args=(user_text, thinking_index, task_context)).start()
+
+    def build_task_context(self):
+        """Summarize the first few tasks of each category for the AI prompt"""
+        today = datetime.now().date()
+        lines = []
+        for category, title in (("overdue", "Overdue"), ("today", "Due today"), ("upcoming", "Upcoming")):
+            tasks = self.task_store.top(category, AI_CONTEXT_TASKS, today)
+            if tasks:
+                listed = "; ".join(f"{t.name} (due {t.due_date}, priority {t.priority})" for t in tasks)
+                lines.append(f"{title}: {listed}")
+        return "\n" + "\n".join(lines) if lines else ""
+
+    def get_ai_response(self, prompt, thinking_index, task_context=""):
         try:
             # If there are uploaded files, include their paths in the context
             uploaded_files = [f for f in os.listdir(self.upload_folder)]
@@ -582,7 +656,7 @@ class TodoApp:
                         <command>delete;[task]</command>
                         <command>edit;[old task];[new task];[new date];[new priority]</command>
 
-                        Current time: {datetime.now().strftime("%m-%d-%Y")}{files_context}
+                        Current time: {datetime.now().strftime("%m-%d-%Y")}{task_context}{files_context}
                         User: {prompt}""",
                     'stream': True
                 },
@@ -711,39 +785,65 @@ class TodoApp:
     def handle_ai_commands(self, full_response):
         # Extract commands from response
         command_pattern = re.compile(r'<command>(.*?)</command>', re.DOTALL)
-        commands = command_pattern.findall(full_response)
-        
-        # Process commands silently without displaying the message again
-        for cmd in commands:
-            self.process_command(cmd.strip())
+        commands = [cmd.strip() for cmd in command_pattern.findall(full_response)]
+        if commands:
+            self.run_ai_commands(commands)
+
+    def run_ai_commands(self, commands):
+        """Apply a burst of AI commands as one all-or-nothing batch, saved and refreshed once"""
+        messages = []
+        completed = 0
+        try:
+            with self.task_store.transaction():
+                for cmd in commands:
+                    message, finished = self.process_command(cmd)
+                    if message:
+                        messages.append(message)
+                    completed += finished
+        except (IndexError, ValueError) as e:
+            self.update_chat_history(f"AI: Error processing command: {str(e)} (no changes were made)")
+            return
+
+        if not messages:
+            return
+        if completed:
+            for _ in range(completed):
+                self.tasks_completed += 1
+                if self.tasks_completed % 5 == 0:
+                    self.level += 1
+            self.save_character()
+            self.update_character_labels()
+        self.after_tasks_changed()
+        self.refresh_task_list()
+        for message in messages:
+            self.update_chat_history(message)
 
     def process_command(self, cmd_text):
+        """Apply one command to the task store; returns (chat message, tasks completed)"""
         parts = [p.strip() for p in cmd_text.split(';')]
         if not parts:
-            return
+            return None, 0
 
         action = parts[0].lower()
         
-        try:
-            if action == "add":
-                task = parts[1]
-                date = parts[2]
-                priority = parts[3]
-                self.add_task_programmatically(task, date, priority)
-            elif action == "finish":
-                task = parts[1]
-                self.complete_task_by_name(task)
-            elif action == "delete":
-                task = parts[1]
-                self.delete_task_by_name(task)
-            elif action == "edit":
-                old_task = parts[1]
-                new_task = parts[2]
-                new_date = parts[3]
-                new_priority = parts[4]
-                self.edit_task_programmatically(old_task, new_task, new_date, new_priority)
-        except (IndexError, ValueError) as e:
-            self.update_chat_history(f"AI: Error processing command: {str(e)}")
+        if action == "add":
+            task = parts[1]
+            date = parts[2]
+            priority = parts[3]
+            return self.add_task_programmatically(task, date, priority), 0
+        elif action == "finish":
+            task = parts[1]
+            return self.complete_task_by_name(task), 1
+        elif action == "delete":
+            task = parts[1]
+            return self.delete_task_by_name(task), 0
+        elif action == "edit":
+            old_task = parts[1]
+            new_task = parts[2]
+            new_date = parts[3]
+            new_priority = parts[4]
+            return self.edit_task_programmatically(old_task, new_task, new_date, new_priority), 0
+        return None, 0
 
     def add_task_programmatically(self, task, date_str, priority_str):
         date = self.parse_date(date_str)
@@ -757,34 +857,23 @@ class TodoApp:
         except ValueError:
             raise ValueError("Priority must be 1-5")
 
-        self.add_task(task, date, priority)
-        self.update_chat_history(f"AI: Task '{task}' added successfully!")
+        self.task_store.add(Task(task, date, priority))
+        return f"AI: Task '{task}' added successfully!"
 
     def complete_task_by_name(self, task_name):
-        tasks = self.load_tasks()
-        for t in tasks:
-            if t[0] == task_name:
-                tasks.remove(t)
-                self.tasks_completed += 1
-                if self.tasks_completed % 5 == 0:
-                    self.level += 1
-                self.save_character()
-                self.update_character_labels()
-                self.save_tasks(tasks)
-                self.refresh_task_list()
-                self.update_chat_history(f"AI: Task '{task_name}' completed!")
-                return
-        raise ValueError("Task not found")
+        task = self.task_store.find_by_name(task_name)
+        if task is None:
+            raise ValueError(f"Task '{task_name}' not found")
+        self.task_store.remove(task)
+        return f"AI: Task '{task_name}' completed!"
 
     def delete_task_by_name(self, task_name):
-        tasks = self.load_tasks()
-        new_tasks = [t for t in tasks if t[0] != task_name]
-        if len(new_tasks) != len(tasks):
-            self.save_tasks(new_tasks)
-            self.refresh_task_list()
-            self.update_chat_history(f"AI: Task '{task_name}' deleted!")
-        else:
-            raise ValueError("Task not found")
+        task_ids = self.task_store.ids_by_name(task_name)
+        if not task_ids:
+            raise ValueError(f"Task '{task_name}' not found")
+        for task_id in task_ids:
+            self.task_store.remove(task_id)
+        return f"AI: Task '{task_name}' deleted!"
 
     def edit_task_programmatically(self, old_task_name, new_task_name, new_date_str, new_priority_str):
         new_date = self.parse_date(new_date_str)
@@ -798,15 +887,11 @@ class TodoApp:
         except ValueError:
             raise ValueError("Priority must be 1-5")
 
-        tasks = self.load_tasks()
-        for i, t in enumerate(tasks):
-            if t[0] == old_task_name:
-                tasks[i] = (new_task_name, new_date, new_priority)
-                self.save_tasks(tasks)
-                self.refresh_task_list()
-                self.update_chat_history(f"AI: Task updated successfully!")
-                return
-        raise ValueError("Task not found")
+        task = self.task_store.find_by_name(old_task_name)
+        if task is None:
+            raise ValueError(f"Task '{old_task_name}' not found")
+        self.task_store.update(Task(new_task_name, new_date, new_priority, task_id=task.task_id))
+        return "AI: Task updated successfully!"
 
     def change_ai_model(self, model_name):
         self.current_ai_model = model_name
@@ -939,22 +1024,33 @@ class TodoApp:
             self.startup_var.set(True)
 
     def start_auto_refresh(self):
-        """Start the auto-refresh timer"""
-        # Check tasks every minute (60000 milliseconds)
-        self.check_tasks_status()
-        self.root.after(60000, self.start_auto_refresh)
+        """Arm one timer for the next moment any task changes category"""
+        if self.refresh_timer is not None:
+            self.root.after_cancel(self.refresh_timer)
+            self.refresh_timer = None
+
+        now = datetime.now()
+        next_ordinal = self.task_store.next_transition(now.date())
+        if next_ordinal is None:
+            # No task can change status until the list changes; stay idle
+            return
+
+        # Fire just after midnight of the day the next task changes category
+        delay = datetime.fromordinal(next_ordinal) - now
+        delay_ms = int(delay.total_seconds() * 1000) + 1000
+        self.refresh_timer = self.root.after(min(delay_ms, MAX_REFRESH_DELAY_MS), self.check_tasks_status)
 
     def check_tasks_status(self):
-        """Check if tasks need to be refreshed"""
+        """Refresh the list if a day boundary has passed, then re-arm the timer"""
+        self.refresh_timer = None
         current_date = datetime.now().date()
         
-        # Refresh if:
-        # 1. The date has changed (midnight crossed)
-        # 2. Or if there are tasks in the list (to update overdue status)
-        if (current_date != self.last_refresh_date or 
-            len(self.tree.get_children()) > 0):
+        # Refresh only if the date has changed (midnight crossed); a capped
+        # timer that fires early just re-arms itself
+        if current_date != self.last_refresh_date:
             self.refresh_task_list()
             self.last_refresh_date = current_date
+        self.start_auto_refresh()
     
     def load_daily_tasks(self):
         self.tasks = []  # Initialize tasks list
@@ -962,11 +1058,8 @@ class TodoApp:
             with open(DAILY_TASK_FILE, "w") as f:
                 pass
 
-        with open(DAILY_TASK_FILE, "r") as file:
-            for line in file:
-                task = line.strip()
-                if task:
-                    self.add_daily_task_from_file(task)
+        for task in self.file_cache.load(DAILY_TASK_FILE, parse_lines, ()):
+            self.add_daily_task_from_file(task)
 
     def add_daily_task_from_file(self, task_text):
         # Create a frame for each task with its buttons
@@ -1071,17 +1164,58 @@ class TodoApp:
         # Save the new order
         self.save_daily_tasks()
 
-    def save_daily_tasks(self):
-        """Modified to respect storage preference"""
+    def save_daily_tasks(self, skip_mysql=False):
+        """Modified to respect storage preference and sync to MySQL if enabled"""
         if self.store_tasks.get():
-            tasks = []
-            for task in self.tasks:
-                if task.winfo_exists():  # Check if widget still exists
-                    tasks.append(task.cget("text"))
-    
-            with open(DAILY_TASK_FILE, "w") as file:
-                for task in tasks:
-                    file.write(task + "\n")
+            self.persistence.schedule(DAILY_TASK_FILE, self.write_daily_tasks)
+        # Peers see daily task edits without waiting for the next task change
+        if self.mysql_enabled.get() and not skip_mysql:
+            self.sync_tasks_to_mysql()
+
+    def write_daily_tasks(self):
+        """Write the daily tasks as they are at flush time"""
+        tasks = []
+        for task in self.tasks:
+            if task.winfo_exists():  # Check if widget still exists
+                tasks.append(task.cget("text"))
+        atomic_write(DAILY_TASK_FILE, "".join(task + "\n" for task in tasks))
+
+    def watch_data_files(self):
+        self.file_watcher.watch(self.task_store.watched_paths() + [DAILY_TASK_FILE, CHARACTER_FILE])
+
+    def on_data_file_changed(self, path):
+        """Fold in a change another running instance made to one of the data files"""
+        if path in [os.path.abspath(p) for p in self.task_store.watched_paths()]:
+            if self.task_store.reload_external():
+                self.refresh_task_list()
+                self.start_auto_refresh()
+        elif path == os.path.abspath(DAILY_TASK_FILE):
+            # A pending local write wins; it is about to overwrite the file anyway
+            if not self.persistence.is_dirty(DAILY_TASK_FILE):
+                daily_tasks = list(self.file_cache.load(DAILY_TASK_FILE, parse_lines, ()))
+                if daily_tasks != [task.cget("text") for task in self.tasks if task.winfo_exists()]:
+                    self.replace_daily_tasks(daily_tasks)
+        elif path == os.path.abspath(CHARACTER_FILE):
+            if not self.persistence.is_dirty(CHARACTER_FILE):
+                self.load_character()
+
+    def on_close(self):
+        """Write out anything still pending before the window goes away"""
+        self.file_watcher.stop()
+        self.root.after_cancel(self.mysql_pull_timer)
+        self.mysql_health.stop()
+        # Queued MySQL changes get a few seconds to go out; the window is hidden
+        # meanwhile, and what the push reports back is saved with everything else
+        self.root.withdraw()
+        self.mysql_sync.stop()
+        self.persistence.flush()
+        try:
+            self.task_store.close()
+        except Exception as e:
+            print(f"Error closing task storage: {e}")
+        if self.mysql_pool is not None:
+            self.mysql_pool.close()
+        self.root.destroy()
 
     def add_daily_task(self):
         task_text = simpledialog.askstring("New Task", "Enter task:")
@@ -1121,11 +1255,10 @@ class TodoApp:
     def load_storage_preference(self):
         """Load the user's preference for storing tasks"""
         storage_file = str(Path.home()) + "/TODOapp/storage_pref.txt"
-        try:
-            with open(storage_file, "r") as f:
-                pref = f.read().strip()
-                self.store_tasks.set(pref == "True")
-        except FileNotFoundError:
+        pref = self.file_cache.load(storage_file, parse_text)
+        if pref is not None:
+            self.store_tasks.set(pref == "True")
+        else:
             # Default to False if file doesn't exist
             self.store_tasks.set(False)
             # Save the default preference
@@ -1137,6 +1270,41 @@ class TodoApp:
         with open(storage_file, "w") as f:
             f.write(str(self.store_tasks.get()))
 
+    def load_storage_backend(self):
+        """Load which task storage backend the user selected"""
+        backend = self.file_cache.load(STORAGE_BACKEND_FILE, parse_text, "text")
+        if backend in STORAGE_BACKENDS:
+            self.storage_backend.set(backend)
+
+    def save_storage_backend(self):
+        """Save which task storage backend the user selected"""
+        with open(STORAGE_BACKEND_FILE, "w") as f:
+            f.write(self.storage_backend.get())
+
+    def create_task_store(self, backend):
+        """Create the task store for the given backend name"""
+        try:
+            _, store_class, path = STORAGE_BACKENDS[backend]
+            store = store_class(path, file_lock=self.data_lock)
+        except Exception as e:
+            print(f"Error opening {backend} task storage: {e}")
+            self.storage_backend.set("text")
+            store = TaskStore(TODO_FILE, file_lock=self.data_lock)
+        store.defer_save = lambda writer: self.persistence.schedule(store.path, writer)
+        return store
+
+    def change_storage_backend(self):
+        """Move the current tasks into the newly selected storage backend"""
+        tasks = self.task_store.all()
+        self.persistence.flush()
+        self.task_store.close()
+        self.task_store = self.create_task_store(self.storage_backend.get())
+        self.task_store.set_tasks(tasks)
+        self.save_storage_backend()
+        self.watch_data_files()
+        self.refresh_task_list()
+        self.start_auto_refresh()
+
     def toggle_storage(self):
         """Toggle whether tasks are stored persistently"""
         self.save_storage_preference()
@@ -1185,6 +1353,17 @@ class TodoApp:
             variable=self.store_tasks,
             command=self.toggle_storage
         )
+
+        # Task storage backend submenu
+        storage_menu = tk.Menu(self.options_menu, tearoff=0)
+        for backend, (label, _, _) in STORAGE_BACKENDS.items():
+            storage_menu.add_radiobutton(
+                label=label,
+                value=backend,
+                variable=self.storage_backend,
+                command=self.change_storage_backend
+            )
+        self.options_menu.add_cascade(label="Task Storage", menu=storage_menu)
         
         # Create Share menu with all sharing options
         self.share_menu = tk.Menu(menubar, tearoff=0)
@@ -1201,6 +1380,8 @@ class TodoApp:
             command=self.toggle_mysql
         )
         self.share_menu.add_command(label="Configure MySQL Connection", command=self.configure_mysql)
+        self.share_menu.add_command(label="MySQL Sync: Idle", state=tk.DISABLED)
+        self.mysql_sync_index = self.share_menu.index("end")
         
         # Add menus to menubar
         menubar.add_cascade(label="Options", menu=self.options_menu)
@@ -1225,11 +1406,30 @@ class TodoApp:
         # Always keep Configure MySQL Connection enabled
         self.share_menu.entryconfigure("Configure MySQL Connection", state=tk.NORMAL)
 
+    def on_mysql_sync_state(self, state, backlog, error=None):
+        """Show the background sync worker's state in the Share menu"""
+        if error is not None:
+            self.mysql_sync_error = error
+        elif state == "idle":
+            self.mysql_sync_error = None
+        label = f"MySQL Sync: {state.capitalize()}"
+        if backlog:
+            label += f" ({backlog} pending)"
+        self.share_menu.entryconfigure(self.mysql_sync_index, label=label)
+
+    def on_mysql_status_changed(self, status):
+        """Called by the health monitor when the cached MySQL status changes"""
+        if status == "running":
+            # Anything left in the outbox can go out now
+            self.mysql_sync.retry_now()
+
     def show_mysql_status_details(self):
         """Show detailed MySQL status information"""
-        mysql_status = self.check_mysql_status()
+        mysql_status = self.mysql_health.current()
         
-        if mysql_status == "running":
+        if mysql_status is None:
+            message = "MySQL status is still being checked.\n\nPlease try again in a moment."
+        elif mysql_status == "running":
             message = "MySQL is running and properly configured."
         elif mysql_status == "access_denied":
             message = "MySQL is running, but the credentials are incorrect.\n\nPlease use 'Configure MySQL Connection' to update your credentials."
@@ -1237,47 +1437,80 @@ class TodoApp:
             message = "MySQL service is installed but not running.\n\nYou can start it manually through Windows Services or by disabling and re-enabling MySQL sharing."
         else:
             message = "MySQL is not installed or not detected.\n\nPlease install MySQL Server to use this feature."
+
+        age = self.mysql_health.age()
+        if age is not None:
+            message += f"\n\n(Checked {age:.0f} seconds ago.)"
+
+        backlog = self.mysql_sync.outbox.depth
+        if backlog:
+            message += f"\n\n{backlog} change(s) are waiting to be sent to MySQL."
+        if self.mysql_sync_error:
+            message += f"\n\nThe last sync failed: {self.mysql_sync_error}"
         
         messagebox.showinfo("MySQL Status Details", message)
 
     def toggle_mysql(self):
         """Toggle MySQL sharing functionality with installation check"""
         if self.mysql_enabled.get():
-            # Check if MySQL is installed first
-            mysql_status = self.check_mysql_status()
-            
-            if mysql_status == "not_installed":
-                # MySQL not installed - show installation guide
-                self.show_mysql_installation_guide()
-                # Reset the checkbox since MySQL isn't available
-                self.mysql_enabled.set(False)
-            elif mysql_status == "not_running":
-                # MySQL installed but not running
-                if messagebox.askyesno("MySQL Service", 
-                                      "MySQL is installed but not running. Would you like to try starting it?"):
-                    if self.start_mysql_service():
-                        # Service started, now open config dialog
-                        self.configure_mysql(after_config=self.test_and_enable_mysql)
-                    else:
-                        messagebox.showerror("Service Error", 
-                                            "Could not start MySQL service. Please start it manually.")
-                        self.mysql_enabled.set(False)
+            # Decide on a fresh probe; the cached status may be stale while sharing was off
+            requested = time.monotonic()
+            self.mysql_health.refresh()
+            self.await_mysql_status(requested)
+        else:
+            messagebox.showinfo("MySQL Disabled", "MySQL sharing has been disabled.")
+            self.save_mysql_config()
+            self.update_share_menu_state()
+            self.mysql_health.active = False
+
+    def await_mysql_status(self, requested):
+        """Finish enabling MySQL once a probe started after requested has answered"""
+        if not self.mysql_enabled.get():
+            return  # Unticked while waiting
+        if self.mysql_health.probed_since(requested):
+            self.enable_mysql_for_status(self.mysql_health.status)
+        elif time.monotonic() - requested > MYSQL_PROBE_TIMEOUT:
+            self.enable_mysql_for_status("unreachable")
+        else:
+            self.root.after(MYSQL_STATUS_POLL_MS, self.await_mysql_status, requested)
+
+    def enable_mysql_for_status(self, mysql_status):
+        """Enable MySQL sharing, or guide the user through whatever stands in the way"""
+        if mysql_status == "unreachable":
+            messagebox.showerror("MySQL Unreachable",
+                                 "MySQL did not answer in time. Please check that it is running and try again.")
+            self.mysql_enabled.set(False)
+        elif mysql_status == "not_installed":
+            # MySQL not installed - show installation guide
+            self.show_mysql_installation_guide()
+            # Reset the checkbox since MySQL isn't available
+            self.mysql_enabled.set(False)
+        elif mysql_status == "not_running":
+            # MySQL installed but not running
+            if messagebox.askyesno("MySQL Service", 
+                                  "MySQL is installed but not running. Would you like to try starting it?"):
+                if self.start_mysql_service():
+                    self.mysql_health.refresh()
+                    # Service started, now open config dialog
+                    self.configure_mysql(after_config=self.test_and_enable_mysql)
                 else:
+                    messagebox.showerror("Service Error", 
+                                        "Could not start MySQL service. Please start it manually.")
                     self.mysql_enabled.set(False)
-            elif mysql_status == "access_denied":
-                # MySQL is running but credentials are wrong - open config dialog
-                messagebox.showinfo("MySQL Configuration", 
-                                   "MySQL is running, but we need the correct credentials to connect.")
-                self.configure_mysql(after_config=self.test_and_enable_mysql)
             else:
-                # MySQL is installed and running with correct credentials
-                self.test_and_enable_mysql()
+                self.mysql_enabled.set(False)
+        elif mysql_status == "access_denied":
+            # MySQL is running but credentials are wrong - open config dialog
+            messagebox.showinfo("MySQL Configuration", 
+                               "MySQL is running, but we need the correct credentials to connect.")
+            self.configure_mysql(after_config=self.test_and_enable_mysql)
         else:
-            messagebox.showinfo("MySQL Disabled", "MySQL sharing has been disabled.")
-            self.save_mysql_config()
-        
+            # MySQL is installed and running with correct credentials
+            self.test_and_enable_mysql()
+
         # Update menu state after toggling
         self.update_share_menu_state()
+        self.mysql_health.active = self.mysql_enabled.get()
 
     def update_mysql_menu(self):
         """Update the MySQL status menu item by recreating it"""
@@ -1518,38 +1751,36 @@ https://dev.mysql.com/doc/mysql-installation-excerpt/8.0/en/
     def load_mysql_config(self):
         """Load MySQL configuration from file with better security"""
         try:
-            if os.path.exists(MYSQL_CONFIG_FILE):
-                with open(MYSQL_CONFIG_FILE, 'r') as f:
-                    config = json.load(f)
-                    
-                    # Load basic config
-                    self.mysql_config = {
-                        'host': config['config']['host'],
-                        'user': config['config']['user'],
-                        'database': config['config']['database']
-                    }
-                    
-                    # Get password from system keyring if available
-                    try:
-                        password = keyring.get_password("todoapp_mysql", self.mysql_config['user'])
-                        if password:
-                            self.mysql_config['password'] = password
-                        else:
-                            # Fall back to encoded password from file
-                            encoded_pw = config['config'].get('encoded_password', '')
-                            if encoded_pw:
-                                self.mysql_config['password'] = base64.b64decode(encoded_pw).decode('utf-8')
-                            else:
-                                self.mysql_config['password'] = ''
-                    except:
-                        # If keyring fails, use encoded password from file
+            config = self.file_cache.load(MYSQL_CONFIG_FILE, json.loads)
+            if config is not None:
+                # Load basic config
+                self.mysql_config = {
+                    'host': config['config']['host'],
+                    'user': config['config']['user'],
+                    'database': config['config']['database']
+                }
+                
+                # Get password from system keyring if available
+                try:
+                    password = keyring.get_password("todoapp_mysql", self.mysql_config['user'])
+                    if password:
+                        self.mysql_config['password'] = password
+                    else:
+                        # Fall back to encoded password from file
                         encoded_pw = config['config'].get('encoded_password', '')
                         if encoded_pw:
                             self.mysql_config['password'] = base64.b64decode(encoded_pw).decode('utf-8')
                         else:
                             self.mysql_config['password'] = ''
-                    
-                    self.mysql_enabled.set(config['enabled'])
+                except:
+                    # If keyring fails, use encoded password from file
+                    encoded_pw = config['config'].get('encoded_password', '')
+                    if encoded_pw:
+                        self.mysql_config['password'] = base64.b64decode(encoded_pw).decode('utf-8')
+                    else:
+                        self.mysql_config['password'] = ''
+                
+                self.mysql_enabled.set(config['enabled'])
         except Exception as e:
             print(f"Error loading MySQL config: {e}")
             self.mysql_config = {
@@ -1589,40 +1820,34 @@ https://dev.mysql.com/doc/mysql-installation-excerpt/8.0/en/
                 json.dump(config, f)
         except Exception as e:
             print(f"Error saving MySQL config: {e}")
+        # New settings may change the answer
+        self.mysql_health.refresh()
 
     def test_mysql_connection(self):
         """Test MySQL connection with better error handling"""
         try:
-            # First test connection without database
-            config = self.mysql_config.copy()
-            if 'database' in config:
-                db_name = config.pop('database')
-            else:
-                db_name = 'todoapp'  # Default database name
-            
-            # Add timeout to avoid hanging
-            config['connect_timeout'] = 5
+            if not self.mysql_config.get('database'):
+                self.mysql_config['database'] = 'todoapp'  # Default database name
+            db_name = self.mysql_config['database']
+            pool = self.get_mysql_pool()
             
-            # Try to connect
-            conn = mysql.connector.connect(**config)
-            
-            # Check if database exists
-            cursor = conn.cursor()
-            cursor.execute("SHOW DATABASES")
-            databases = [db[0] for db in cursor]
-            
-            if db_name.lower() not in [db.lower() for db in databases]:
-                # Database doesn't exist - create it
-                cursor.execute(f"CREATE DATABASE `{db_name}`")
-                print(f"Created database: {db_name}")
+            # Connect without selecting the database first
+            with pool.connection(use_database=False) as conn:
+                # Check if database exists
+                cursor = conn.cursor()
+                cursor.execute("SHOW DATABASES")
+                databases = [db[0] for db in cursor]
                 
-            cursor.close()
-            conn.close()
+                if db_name.lower() not in [db.lower() for db in databases]:
+                    # Database doesn't exist - create it
+                    cursor.execute(f"CREATE DATABASE `{db_name}`")
+                    print(f"Created database: {db_name}")
+                    
+                cursor.close()
             
-            # Now try connecting with the database
-            self.mysql_config['database'] = db_name
-            conn = mysql.connector.connect(**self.mysql_config)
-            conn.close()
+            # Now try selecting the database
+            with pool.connection():
+                pass
             
             return True
         except mysql.connector.Error as err:
@@ -1644,109 +1869,165 @@ https://dev.mysql.com/doc/mysql-installation-excerpt/8.0/en/
             print(f"MySQL connection error: {e}")
             return False
 
-    def setup_mysql_tables(self):
-        """Create necessary tables if they don't exist - only for tasks, not character data"""
+    def mysql_server_id(self):
+        return f"{self.mysql_config['host']}/{self.mysql_config['database']}"
+
+    def load_mysql_base(self):
+        """Rows and pull watermark last seen on the current MySQL server, or none if seen on another"""
+        self.mysql_base_server = self.mysql_server_id()
+        self.mysql_pull_watermark = None
         try:
-            conn = mysql.connector.connect(**self.mysql_config)
-            cursor = conn.cursor()
-            
-            # Create tasks table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    task_name VARCHAR(255) NOT NULL,
-                    due_date VARCHAR(20) NOT NULL,
-                    priority INT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Create daily tasks table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS daily_tasks (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    task_text VARCHAR(255) NOT NULL,
-                    position INT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
+            data = self.file_cache.load(MYSQL_BASE_FILE, json.loads, {})
         except Exception as e:
-            print(f"Error setting up MySQL tables: {e}")
+            print(f"Error loading MySQL sync state: {e}")
+            return {}
+        if data.get("server") != self.mysql_base_server:
+            return {}
+        if data.get("watermark"):
+            # pull_changes reads everything again once this is older than the tombstones go back
+            self.mysql_pull_watermark = datetime.fromisoformat(data["watermark"])
+        return {task_id: (version, Task.coerce(row)) for task_id, (version, row) in data["rows"].items()}
+
+    def save_mysql_base(self):
+        self.persistence.schedule(MYSQL_BASE_FILE, self.write_mysql_base)
+
+    def write_mysql_base(self):
+        rows = {task_id: [version, task.to_row()] for task_id, (version, task) in self.mysql_base.items()}
+        watermark = self.mysql_pull_watermark.isoformat() if self.mysql_pull_watermark else None
+        atomic_write(MYSQL_BASE_FILE, json.dumps({"server": self.mysql_base_server, "watermark": watermark,
+                                                  "rows": rows}))
+
+    def get_mysql_pool(self):
+        """Connection pool for the current MySQL settings, rebuilt when they change"""
+        with self.mysql_pool_lock:
+            if self.mysql_pool is None or self.mysql_pool.config != self.mysql_config:
+                if self.mysql_pool is not None:
+                    self.mysql_pool.close()
+                self.mysql_pool = MySQLPool(self.mysql_config)
+            return self.mysql_pool
+
+    def setup_mysql_tables(self):
+        """Have the sync worker create or migrate the shared tables before its next push or pull"""
+        # Always check when sharing is (re-)enabled; the worker runs the migrations off the Tk thread
+        self.get_mysql_pool().schema_ready = False
+
+    def on_mysql_migrated(self, applied):
+        """Called once the sync worker has migrated the shared tables"""
+        print(f"Migrated MySQL schema to version {applied[-1]}")
+        self.mysql_needs_full_push = True
 
     def sync_tasks_to_mysql(self):
-        """Sync local tasks to MySQL database - only tasks, not character data"""
+        """Queue tasks changed since the last sync for MySQL - only tasks, not character data"""
         if not self.mysql_enabled.get():
             return
         
-        try:
-            conn = mysql.connector.connect(**self.mysql_config)
-            cursor = conn.cursor()
-            
-            # Clear existing tasks
-            cursor.execute("DELETE FROM tasks")
-            cursor.execute("DELETE FROM daily_tasks")
-            
-            # Insert regular tasks
+        upserts, removed = self.task_store.take_changes()
+        daily_tasks = [task.cget("text") for task in self.tasks if task.winfo_exists()]
+        if self.mysql_needs_full_push:
             tasks = self.load_tasks()
-            for task in tasks:
-                cursor.execute(
-                    "INSERT INTO tasks (task_name, due_date, priority) VALUES (%s, %s, %s)",
-                    (task[0], task[1], task[2])
-                )
-            
-            # Insert daily tasks
-            for i, task in enumerate(self.tasks):
-                if task.winfo_exists():
-                    cursor.execute(
-                        "INSERT INTO daily_tasks (task_text, position) VALUES (%s, %s)",
-                        (task.cget("text"), i)
-                    )
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-        except Exception as e:
-            print(f"Error syncing to MySQL: {e}")
+            upserts = [task for task in tasks if not self.matches_mysql_base(task)]
+            local_ids = {task.task_id for task in tasks}
+            removed = [task_id for task_id in self.mysql_base if task_id not in local_ids]
+            self.mysql_needs_full_push = False
+        self.mysql_sync.submit(self.get_mysql_pool(), daily_tasks, upserts, removed, self.mysql_base)
+
+    def matches_mysql_base(self, task):
+        base = self.mysql_base.get(task.task_id)
+        return base is not None and base[1].same_values(task)
+
+    def on_mysql_pushed(self, results, overruled, submitted):
+        """Remember the versions a push wrote, and show conflicts that went the server's way"""
+        for task_id, result in results.items():
+            base = self.mysql_base.get(task_id)
+            if result is None:
+                self.mysql_base.pop(task_id, None)
+            elif base is None or base[0] <= result[0]:
+                self.mysql_base[task_id] = result
+        self.save_mysql_base()
+
+        # Unless the task was edited again since, in which case that edit is on its way
+        if overruled and submitted == self.mysql_sync.submitted:
+            self.apply_mysql_tasks([results[task_id][1] for task_id in overruled if results[task_id]],
+                                   [task_id for task_id in overruled if results[task_id] is None])
 
     def sync_tasks_from_mysql(self):
-        """Sync tasks from MySQL to local storage - only tasks, not character data"""
+        """Ask the sync worker for rows other clients changed since the last pull"""
+        self.mysql_pull_timer = self.root.after(MYSQL_PULL_INTERVAL_MS, self.sync_tasks_from_mysql)
         if not self.mysql_enabled.get():
             return
-        
-        try:
-            conn = mysql.connector.connect(**self.mysql_config)
-            cursor = conn.cursor()
-            
-            # Get regular tasks
-            cursor.execute("SELECT task_name, due_date, priority FROM tasks ORDER BY due_date")
-            tasks = cursor.fetchall()
-            self.save_tasks(tasks, skip_mysql=True)  # Skip MySQL sync to avoid loop
-            
-            # Get daily tasks
-            cursor.execute("SELECT task_text FROM daily_tasks ORDER BY position")
-            daily_tasks = cursor.fetchall()
-            
-            # Clear existing daily tasks
-            for task in self.tasks[:]:
-                task.frame.destroy()
-            self.tasks.clear()
-            
-            # Add daily tasks from MySQL
-            for task in daily_tasks:
-                self.add_daily_task_from_file(task[0])
-            
-            cursor.close()
-            conn.close()
-            
-            # Refresh the UI
+        if self.mysql_needs_full_push:
+            # Local state goes out before anything is read back over it
+            self.sync_tasks_to_mysql()
+        self.mysql_sync.request_pull(self.get_mysql_pool(), self.mysql_pull_watermark)
+
+    def apply_mysql_pull(self, pull):
+        """Fold rows other clients changed into the task store and daily tasks"""
+        # Changes queued after the pull started are newer than what it read;
+        # the watermark stays put and the next pull reads those rows again
+        if not self.mysql_enabled.get() or pull.submitted != self.mysql_sync.submitted:
+            return
+        changes = pull.changes
+
+        pulled_ids = {task.task_id for task in changes.tasks}
+        if changes.full:
+            # Rows seen on the server before and missing now were deleted there
+            gone = [task_id for task_id in self.mysql_base if task_id not in pulled_ids]
+            self.mysql_base = {}
+        else:
+            gone = [task_id for task_id in changes.deleted_ids if task_id not in pulled_ids]
+        self.apply_mysql_tasks(changes.tasks, gone)
+        for task in changes.tasks:
+            self.mysql_base[task.task_id] = (changes.versions[task.task_id], task)
+        for task_id in gone:
+            self.mysql_base.pop(task_id, None)
+        self.mysql_pull_watermark = changes.watermark
+        self.save_mysql_base()
+
+        if pull.daily_tasks is not None and self.update_daily_tasks(pull.daily_tasks):
+            self.save_daily_tasks(skip_mysql=True)
+
+    def apply_mysql_tasks(self, tasks, removed_ids):
+        """Write tasks as the server has them into the store, without queueing them for a push"""
+        unsynced_upserts, unsynced_removed = self.task_store.take_changes()
+        changed = False
+        with self.task_store.transaction():
+            for task in tasks:
+                local = self.task_store.get(task.task_id)
+                if local is None:
+                    self.task_store.add(task)
+                elif not local.same_values(task):
+                    self.task_store.update(task)
+                else:
+                    continue
+                changed = True
+            for task_id in removed_ids:
+                if task_id in self.task_store:
+                    self.task_store.remove(task_id)
+                    changed = True
+        self.task_store.take_changes()
+        self.task_store.mark_changed([task.task_id for task in unsynced_upserts] + unsynced_removed)
+
+        if changed:
             self.refresh_task_list()
-        except Exception as e:
-            print(f"Error syncing from MySQL: {e}")
-            messagebox.showerror("Sync Error", f"Failed to sync from MySQL: {str(e)}")
+            self.start_auto_refresh()
+        return changed
+
+    def update_daily_tasks(self, daily_tasks):
+        """Make the daily task widgets show daily_tasks, touching only positions that differ"""
+        current = [task for task in self.tasks if task.winfo_exists()]
+        changed = False
+        for position, text in enumerate(daily_tasks):
+            if position >= len(current):
+                self.add_daily_task_from_file(text)
+                changed = True
+            elif current[position].cget("text") != text:
+                current[position].config(text=text)
+                changed = True
+        for task in current[len(daily_tasks):]:
+            self.tasks.remove(task)
+            task.frame.destroy()
+            changed = True
+        return changed
 
     def share_tasks_on_lan(self):
         """Share tasks with other instances on the LAN - only tasks, not character data"""
@@ -1793,7 +2074,7 @@ https://dev.mysql.com/doc/mysql-installation-excerpt/8.0/en/
                     
                     # Prepare data to send - ONLY tasks, not character data
                     data = {
-                        'tasks': self.load_tasks(),
+                        'tasks': [task.to_row() for task in self.load_tasks()],
                         'daily_tasks': [task.cget("text") for task in self.tasks if task.winfo_exists()]
                     }
                     
@@ -1864,7 +2145,7 @@ https://dev.mysql.com/doc/mysql-installation-excerpt/8.0/en/
                     imported_tasks = data['tasks']
                     
                     # Create a set of existing task names for quick lookup
-                    existing_task_names = {task[0] for task in existing_tasks}
+                    existing_task_names = {task.name for task in existing_tasks}
                     
                     # Add only new tasks
                     for task in imported_tasks:
@@ -1883,7 +2164,8 @@ https://dev.mysql.com/doc/mysql-installation-excerpt/8.0/en/
                         if task_text not in existing_daily_tasks:
                             self.add_daily_task_from_file(task_text)
                 else:
-                    # Replace tasks
+                    # Replace tasks; the shared tables are rewritten in bulk
+                    self.mysql_needs_full_push = True
                     self.save_tasks(data['tasks'])
                     
                     # Clear existing daily tasks
@@ -1916,7 +2198,7 @@ https://dev.mysql.com/doc/mysql-installation-excerpt/8.0/en/
     def merge_tasks(self, new_tasks):
         """Merge new tasks with existing tasks"""
         current_tasks = self.load_tasks()
-        task_dict = {task[0]: task for task in current_tasks}
+        task_dict = {task.name: task for task in current_tasks}
         
         for new_task in new_tasks:
             if new_task[0] not in task_dict:
@@ -1945,7 +2227,7 @@ https://dev.mysql.com/doc/mysql-installation-excerpt/8.0/en/
         self.save_daily_tasks()
 
     def check_mysql_status(self):
-        """Check MySQL status and return a status code
+        """Check MySQL status and return a status code (blocking; run by the health monitor)
     
         Returns:
             str: One of the following status codes:
@@ -1955,18 +2237,11 @@ https://dev.mysql.com/doc/mysql-installation-excerpt/8.0/en/
                 - "not_installed": MySQL is not installed
         """
         try:
-            # First try to connect without database to check basic connectivity
-            config = self.mysql_config.copy()
-            if 'database' in config:
-                config.pop('database')
-            
-            # Add timeout to avoid hanging
-            config['connect_timeout'] = 3
-            
             try:
-                # Try to connect with the provided credentials
-                conn = mysql.connector.connect(**config)
-                conn.close()
+                # Check basic connectivity without selecting the database; a
+                # pooled connection is pinged so a dead server is noticed
+                with self.get_mysql_pool().connection(use_database=False) as conn:
+                    conn.ping()
                 return "running"
             except mysql.connector.Error as err:
                 if err.errno == mysql.connector.errorcode.ER_ACCESS_DENIED_ERROR:
@@ -2052,6 +2327,9 @@ https://dev.mysql.com/doc/mysql-installation-excerpt/8.0/en/
         if self.test_mysql_connection():
             # Connection successful - setup tables and enable
             self.setup_mysql_tables()
+            self.mysql_needs_full_push = True
+            if self.mysql_base_server != self.mysql_server_id():
+                self.mysql_base = self.load_mysql_base()
             messagebox.showinfo("MySQL Enabled", "MySQL sharing has been enabled successfully.")
             self.save_mysql_config()
             return True
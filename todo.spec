@@ -20,6 +20,13 @@ a = Analysis(
         'keyring',
         'keyring.backends.Windows',
         'todo_updater',
+        'todo_store',
+        'todo_columnar',
+        'todo_view',
+        'todo_persist',
+        'todo_cache',
+        'todo_watch',
+        'todo_mysql',
     ],
     hookspath=[],
     hooksconfig={},
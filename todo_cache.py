@@ -0,0 +1,34 @@
+from todo_store import file_signature
+
+
+class FileCache:
+    """Parsed contents of small data files, re-read only when the file changes
+
+    Entries are keyed on the path and the parser, and validated against the
+    file's mtime, size and inode (atomic renames change the inode even within
+    one mtime tick). Cached values are shared, so callers must treat them as
+    read-only.
+    """
+
+    def __init__(self):
+        self.entries = {}   # (path, parse) -> ((mtime_ns, size, inode), value)
+
+    def load(self, path, parse, default=None):
+        """Return parse(text) for the file at path, or default if it does not exist"""
+        signature = file_signature(path)
+        if signature is None:
+            self.entries.pop((path, parse), None)
+            return default
+        entry = self.entries.get((path, parse))
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        with open(path, "r") as f:
+            value = parse(f.read())
+        self.entries[(path, parse)] = (signature, value)
+        return value
+
+    def invalidate(self, path):
+        """Drop every cached parse of path"""
+        for key in [key for key in self.entries if key[0] == path]:
+            del self.entries[key]
@@ -0,0 +1,203 @@
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+from todo_store import Task, date_ordinal, is_iso_date, new_task_id
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional; without it the task store keeps its row-based code paths
+    np = None
+
+# Task files at least this large (roughly 20k rows) are loaded through the columnar path
+COLUMNAR_THRESHOLD_BYTES = 512 * 1024
+
+# date(1970, 1, 1).toordinal(), to turn numpy day counts into date ordinals
+EPOCH_ORDINAL = 719163
+
+
+def numpy_available():
+    return np is not None
+
+
+def use_columnar(path):
+    """Whether a task file is big enough to be worth loading through NumPy"""
+    try:
+        return np is not None and os.path.getsize(path) >= COLUMNAR_THRESHOLD_BYTES
+    except OSError:
+        return False
+
+
+class TaskTable:
+    """Columnar task list: a date-ordinal array, a priority array and an interned name table"""
+
+    def __init__(self, names, name_ids, ordinals, priorities, task_ids=None):
+        self.names = names            # list of unique task names
+        self.name_ids = name_ids      # int32 index into names, one per row
+        self.ordinals = ordinals      # int64 date ordinal, one per row
+        self.priorities = priorities  # int8 priority, one per row
+        self.task_ids = task_ids      # list of persistent task IDs, one per row
+        self.upgraded = False         # whether any row was given a new ID on load
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    @classmethod
+    def from_columns(cls, names, dates, priorities, task_ids=None):
+        """Build a table from parallel lists of names, dates, priorities and IDs"""
+        table = {}
+        name_ids = np.fromiter((table.setdefault(n, len(table)) for n in names),
+                               dtype=np.int32, count=len(names))
+        return cls(list(table), name_ids, cls.parse_dates(dates),
+                   np.array(priorities, dtype=np.int8), task_ids)
+
+    @classmethod
+    def from_tasks(cls, tasks):
+        """Build a table from Task objects, reusing their cached ordinals"""
+        table = {}
+        name_ids = np.fromiter((table.setdefault(t.name, len(table)) for t in tasks),
+                               dtype=np.int32, count=len(tasks))
+        ordinals = np.fromiter((t.due_ordinal for t in tasks), dtype=np.int64, count=len(tasks))
+        priorities = np.fromiter((t.priority for t in tasks), dtype=np.int8, count=len(tasks))
+        return cls(list(table), name_ids, ordinals, priorities, [t.task_id for t in tasks])
+
+    @classmethod
+    def from_file(cls, path):
+        """Load todo.txt straight into columns without creating per-row Task objects"""
+        names, dates, priorities, task_ids = [], [], [], []
+        seen_ids = set()
+        upgraded = False
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    parts = line.strip().split(" | ")
+                    if len(parts) not in (3, 4):
+                        continue
+                    names.append(parts[0])
+                    dates.append(parts[1])
+                    # Files from before the ISO date format are rewritten once
+                    upgraded = upgraded or not is_iso_date(parts[1])
+                    priorities.append(int(parts[2]))
+                    # Rows from before tasks had IDs, or with a duplicated ID, get a new one
+                    if len(parts) == 4 and parts[3] not in seen_ids:
+                        task_id = parts[3]
+                    else:
+                        task_id = new_task_id()
+                        upgraded = True
+                    seen_ids.add(task_id)
+                    task_ids.append(task_id)
+        table = cls.from_columns(names, dates, priorities, task_ids)
+        table.upgraded = upgraded
+        return table
+
+    @staticmethod
+    def parse_dates(dates):
+        """Vectorized date parsing into ordinals; yyyy-mm-dd dates go straight to NumPy"""
+        iso = [d if is_iso_date(d) else f"{d[6:10]}-{d[0:2]}-{d[3:5]}" if len(d) == 10 else "NaT"
+               for d in dates]
+        days = np.array(iso, dtype="datetime64[D]")
+        ordinals = days.astype(np.int64) + EPOCH_ORDINAL
+        # Loose dates such as 1-3-2025 take the slow path
+        for i in np.flatnonzero(np.isnat(days)):
+            ordinals[i] = date_ordinal(dates[i])
+        return ordinals
+
+    def order(self):
+        """Row indices in default order: earliest due date first, higher priority first"""
+        return np.lexsort((-self.priorities.astype(np.int16), self.ordinals))
+
+    def classify(self, today_ordinal, order=None):
+        """Split row indices into (overdue, due today, upcoming), each in display order"""
+        if order is None:
+            order = self.order()
+        ordinals = self.ordinals[order]
+        return (order[ordinals < today_ordinal],
+                order[ordinals == today_ordinal],
+                order[ordinals > today_ordinal])
+
+    def to_tasks(self, indices):
+        """Materialize Task objects for the given row indices"""
+        names = self.names
+        name_ids = self.name_ids[indices].tolist()
+        ordinals = self.ordinals[indices].tolist()
+        priorities = self.priorities[indices].tolist()
+        if self.task_ids is None:
+            task_ids = [None] * len(ordinals)
+        else:
+            task_ids = [self.task_ids[i] for i in indices.tolist()]
+        return [Task(names[n], date.fromordinal(o).strftime("%m-%d-%Y"), p, o, task_id)
+                for n, o, p, task_id in zip(name_ids, ordinals, priorities, task_ids)]
+
+
+def load_sorted_tasks(path):
+    """Load and order a task file through the columnar path
+
+    Returns (tasks, upgraded) like TaskStore.read_sorted_snapshot.
+    """
+    table = TaskTable.from_file(path)
+    return table.to_tasks(table.order()), table.upgraded
+
+
+def run_benchmark(sizes):
+    """Compare row-based and columnar classification/sort times"""
+    today = date.today().toordinal()
+    print(f"{'rows':>9} {'row load+sort':>14} {'row classify':>13} "
+          f"{'col load':>9} {'col sort':>9} {'col classify':>13}")
+    for size in sizes:
+        rng = random.Random(size)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "todo.txt")
+            with open(path, "w") as f:
+                for _ in range(size):
+                    due = date.fromordinal(today + rng.randint(-60, 120)).isoformat()
+                    f.write(f"Task {rng.randint(0, size // 10)} | {due} | {rng.randint(1, 5)}\n")
+
+            # Row-based: Task per line, Python sort and per-row classification loop
+            start = time.perf_counter()
+            tasks = []
+            with open(path, "r") as f:
+                for line in f:
+                    parts = line.strip().split(" | ")
+                    tasks.append(Task(parts[0], parts[1], parts[2]))
+            tasks.sort(key=lambda t: t.sort_key)
+            row_load = time.perf_counter() - start
+
+            start = time.perf_counter()
+            overdue, due_today, upcoming = [], [], []
+            for task in tasks:
+                if task.due_ordinal < today:
+                    overdue.append(task)
+                elif task.due_ordinal == today:
+                    due_today.append(task)
+                else:
+                    upcoming.append(task)
+            row_classify = time.perf_counter() - start
+
+            # Columnar: arrays straight from the file, argsort and mask
+            start = time.perf_counter()
+            table = TaskTable.from_file(path)
+            col_load = time.perf_counter() - start
+
+            start = time.perf_counter()
+            order = table.order()
+            col_sort = time.perf_counter() - start
+
+            start = time.perf_counter()
+            buckets = table.classify(today, order)
+            col_classify = time.perf_counter() - start
+
+            assert [len(b) for b in buckets] == [len(overdue), len(due_today), len(upcoming)]
+
+        print(f"{size:>9} {row_load:>13.3f}s {row_classify:>12.3f}s "
+              f"{col_load:>8.3f}s {col_sort:>8.3f}s {col_classify:>12.4f}s")
+
+
+if __name__ == "__main__":
+    if not numpy_available():
+        print("NumPy is not installed; the columnar task table is unavailable.")
+        sys.exit(1)
+    run_benchmark([int(arg) for arg in sys.argv[1:]] or [10 ** 4, 10 ** 5, 10 ** 6])
@@ -0,0 +1,1098 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import mysql.connector
+except ImportError:
+    # Only the pool needs the driver; the sync logic can be used (and tested) without it
+    mysql = None
+
+from todo_store import Task, atomic_write
+
+# Pool sizing and upkeep
+MYSQL_POOL_SIZE = 4
+MYSQL_IDLE_TIMEOUT = 300        # seconds an idle connection is kept before it is closed
+MYSQL_HEALTH_CHECK_AFTER = 30   # ping connections that sat idle longer than this
+MYSQL_CONNECT_TIMEOUT = 5
+MYSQL_ACQUIRE_TIMEOUT = 10
+MYSQL_STATUS_TTL = 30           # seconds a health probe result is trusted
+# Longest a status probe can take: waiting for a pool slot, connecting, then the port check
+MYSQL_PROBE_TIMEOUT = MYSQL_ACQUIRE_TIMEOUT + MYSQL_CONNECT_TIMEOUT + 2
+
+# Full pushes send multi-row statements; these bound how much goes in one
+BULK_STATEMENT_MARGIN = 1024    # bytes of max_allowed_packet kept free for protocol overhead
+BULK_ID_CHUNK = 1000            # task IDs per ... IN (...) statement
+
+# Background sync
+SYNC_RETRY_MIN = 2              # seconds before the first retry of a failed push; doubles per failure
+SYNC_RETRY_MAX = 300            # longest wait between retries
+OUTBOX_BATCH_RECORDS = 500      # outbox records replayed per transaction
+SYNC_STOP_TIMEOUT = 10          # seconds to wait on shutdown for queued changes to go out
+SYNC_REPORT_ROWS = 1000         # pushes writing at least this many rows print their rows/sec
+SYNC_PULL_OVERLAP = 5           # seconds re-read before the pull watermark, for commits that landed late
+TOMBSTONE_RETENTION_DAYS = 30   # deletes older than this are forgotten; staler clients pull everything
+
+
+class MySQLPool:
+    """Bounded pool of MySQL connections for one set of credentials
+
+    Connections are opened without a database so the same pool can check for
+    and create the database; connection() selects it on the way out. Idle
+    connections are closed after MYSQL_IDLE_TIMEOUT (checked whenever one is
+    borrowed or returned, and by prune()), and ones that sat idle
+    longer than MYSQL_HEALTH_CHECK_AFTER are pinged (and replaced if dead)
+    before being handed out.
+    """
+
+    def __init__(self, config, size=MYSQL_POOL_SIZE):
+        self.config = dict(config)
+        self.size = size
+        self.idle = []          # (connection, time it was returned), most recent last
+        self.in_use = 0
+        self.closed = False
+        self.schema_ready = False   # set once migrate_schema has run against this server
+        self.condition = threading.Condition()
+
+    def connect_args(self):
+        args = {key: value for key, value in self.config.items() if key != "database"}
+        args.setdefault("connect_timeout", MYSQL_CONNECT_TIMEOUT)
+        return args
+
+    @contextmanager
+    def connection(self, use_database=True):
+        """Borrow a connection; it goes back to the pool (or is dropped if broken) afterwards"""
+        conn = self.acquire()
+        broken = False
+        try:
+            if use_database and self.config.get("database") and conn.database != self.config["database"]:
+                conn.database = self.config["database"]
+            yield conn
+        except mysql.connector.Error:
+            broken = not conn.is_connected()
+            raise
+        finally:
+            self.release(conn, broken)
+
+    def acquire(self):
+        deadline = time.monotonic() + MYSQL_ACQUIRE_TIMEOUT
+        with self.condition:
+            while True:
+                if self.closed:
+                    raise mysql.connector.Error("Connection pool is closed")
+                self.evict_idle()
+                if self.idle:
+                    conn, returned_at = self.idle.pop()
+                    if time.monotonic() - returned_at > MYSQL_HEALTH_CHECK_AFTER and not self.is_healthy(conn):
+                        continue
+                    self.in_use += 1
+                    return conn
+                if self.in_use < self.size:
+                    self.in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise mysql.connector.Error("Timed out waiting for a MySQL connection")
+                self.condition.wait(remaining)
+
+        # Open the new connection outside the lock; the slot is already reserved
+        try:
+            return mysql.connector.connect(**self.connect_args())
+        except Exception:
+            with self.condition:
+                self.in_use -= 1
+                self.condition.notify()
+            raise
+
+    def release(self, conn, broken=False):
+        with self.condition:
+            self.in_use -= 1
+            if broken or self.closed:
+                self.close_quietly(conn)
+            else:
+                try:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    self.idle.append((conn, time.monotonic()))
+                except mysql.connector.Error:
+                    self.close_quietly(conn)
+            self.evict_idle()
+            self.condition.notify()
+
+    def prune(self):
+        """Close connections idle past MYSQL_IDLE_TIMEOUT without borrowing one"""
+        with self.condition:
+            self.evict_idle()
+
+    def evict_idle(self):
+        """Close connections idle for longer than MYSQL_IDLE_TIMEOUT (called with the lock held)"""
+        cutoff = time.monotonic() - MYSQL_IDLE_TIMEOUT
+        while self.idle and self.idle[0][1] < cutoff:
+            self.close_quietly(self.idle.pop(0)[0])
+
+    def is_healthy(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except mysql.connector.Error:
+            self.close_quietly(conn)
+            return False
+
+    @staticmethod
+    def close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Close idle connections now and borrowed ones when they come back"""
+        with self.condition:
+            self.closed = True
+            for conn, _ in self.idle:
+                self.close_quietly(conn)
+            self.idle.clear()
+            self.condition.notify_all()
+
+
+# Every write bumps row_version (and with it updated_at) on the rows it touches
+CAS_UPDATE_TASK_SQL = (
+    "UPDATE tasks SET task_name = %s, due_date = %s, priority = %s, row_version = row_version + 1 "
+    "WHERE task_uid = %s AND row_version = %s"
+)
+
+UPSERT_DAILY_TASK_SQL = (
+    "INSERT INTO daily_tasks (position, task_text) VALUES (%s, %s) "
+    "ON DUPLICATE KEY UPDATE task_text = VALUES(task_text), row_version = row_version + 1"
+)
+
+SCHEMA_LOCK_NAME = "todoapp_schema"
+SCHEMA_LOCK_TIMEOUT = 30
+
+
+# Task attributes merged one by one when two clients changed the same task
+TASK_FIELDS = ("name", "iso_date", "priority")
+
+
+def task_params(task):
+    return (task.task_id, task.name, task.iso_date, task.priority)
+
+
+def task_values(task):
+    return (task.name, task.iso_date, task.priority)
+
+
+def has_column(cursor, table, column):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table, column)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def has_index(cursor, table, index):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+        (table, index)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def migrate_base_tables(cursor):
+    """Tasks keyed by task_uid with ISO due dates, daily tasks unique by position
+
+    Also brings tables created by earlier versions of the app (no task_uid,
+    mm-dd-yyyy dates, daily tasks without the position key) up to that shape.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            task_name VARCHAR(255) NOT NULL,
+            due_date VARCHAR(20) NOT NULL,
+            priority INT NOT NULL,
+            task_uid VARCHAR(32) NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uq_tasks_task_uid (task_uid)
+        )
+    ''')
+
+    # Tables created before tasks had IDs get the column added
+    if not has_column(cursor, "tasks", "task_uid"):
+        cursor.execute("ALTER TABLE tasks ADD COLUMN task_uid VARCHAR(32) NULL, "
+                       "ADD UNIQUE KEY uq_tasks_task_uid (task_uid)")
+    assign_task_uids(cursor)
+
+    # Rows written before due dates were stored as yyyy-mm-dd are converted once
+    cursor.execute(
+        "UPDATE tasks SET due_date = DATE_FORMAT(STR_TO_DATE(due_date, '%m-%d-%Y'), '%Y-%m-%d') "
+        "WHERE due_date LIKE '__-__-____'"
+    )
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_tasks (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            task_text VARCHAR(255) NOT NULL,
+            position INT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uq_daily_tasks_position (position)
+        )
+    ''')
+
+    # Daily tasks are upserted by position; the key also serves ORDER BY position
+    if not has_index(cursor, "daily_tasks", "uq_daily_tasks_position"):
+        # Two clients rewriting the list at once could leave a position twice; the newest row stays
+        cursor.execute("DELETE older FROM daily_tasks AS older JOIN daily_tasks AS newer "
+                       "ON newer.position = older.position AND newer.id > older.id")
+        cursor.execute("ALTER TABLE daily_tasks ADD UNIQUE KEY uq_daily_tasks_position (position)")
+
+
+def assign_task_uids(cursor):
+    """Give rows written without a task_uid (by older clients) one, so pulls bring them in"""
+    cursor.execute("UPDATE tasks SET task_uid = REPLACE(UUID(), '-', '') WHERE task_uid IS NULL")
+
+
+def migrate_typed_due_dates(cursor):
+    """Store due dates as DATE and index them with priority for sorted reads"""
+    # Anything that is still not yyyy-mm-dd could not be converted; it becomes due today
+    cursor.execute("UPDATE tasks SET due_date = DATE_FORMAT(CURDATE(), '%Y-%m-%d') "
+                   "WHERE due_date NOT REGEXP '^[0-9]{4}-[0-9]{2}-[0-9]{2}$'")
+    cursor.execute("ALTER TABLE tasks MODIFY due_date DATE NOT NULL")
+    if not has_index(cursor, "tasks", "idx_tasks_due_priority"):
+        cursor.execute("ALTER TABLE tasks ADD INDEX idx_tasks_due_priority (due_date, priority)")
+
+
+def migrate_row_versions(cursor):
+    """Give every row an updated_at timestamp and a row_version counter"""
+    for table in ("tasks", "daily_tasks"):
+        if not has_column(cursor, table, "updated_at"):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN updated_at TIMESTAMP(6) NOT NULL "
+                           f"DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)")
+        if not has_column(cursor, table, "row_version"):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN row_version INT UNSIGNED NOT NULL DEFAULT 1")
+        if not has_index(cursor, table, f"idx_{table}_updated_at"):
+            cursor.execute(f"ALTER TABLE {table} ADD INDEX idx_{table}_updated_at (updated_at)")
+
+
+def migrate_tombstones(cursor):
+    """Keep the IDs of deleted tasks so incremental pulls see deletes"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS task_tombstones (
+            task_uid VARCHAR(32) NOT NULL PRIMARY KEY,
+            deleted_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+            INDEX idx_task_tombstones_deleted_at (deleted_at)
+        )
+    ''')
+
+
+# (version, description, migration); append new steps, never edit applied ones
+SCHEMA_MIGRATIONS = [
+    (1, "tasks keyed by task_uid, daily tasks keyed by position", migrate_base_tables),
+    (2, "DATE due dates indexed with priority", migrate_typed_due_dates),
+    (3, "updated_at and row_version on every row", migrate_row_versions),
+    (4, "tombstones for deleted tasks", migrate_tombstones),
+]
+
+
+def migrate_schema(cursor):
+    """Apply every migration newer than the database's schema version
+
+    Versions are recorded in schema_version. A named lock keeps two clients
+    from migrating at once. Each step is written to be safe to re-run, since
+    MySQL commits DDL immediately and a step interrupted part way is retried.
+    Returns the versions applied.
+    """
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (SCHEMA_LOCK_NAME, SCHEMA_LOCK_TIMEOUT))
+    if cursor.fetchone()[0] != 1:
+        raise mysql.connector.Error("Timed out waiting for another client's schema migration")
+    try:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INT NOT NULL PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        current = cursor.fetchone()[0]
+        applied = []
+        for version, description, migrate in SCHEMA_MIGRATIONS:
+            if version <= current:
+                continue
+            migrate(cursor)
+            cursor.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                           (version, description))
+            applied.append(version)
+        return applied
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (SCHEMA_LOCK_NAME,))
+        cursor.fetchone()
+
+
+def prune_shared_tables(cursor):
+    """Drop tombstones past TOMBSTONE_RETENTION_DAYS and give IDs to rows older clients wrote"""
+    cursor.execute("DELETE FROM task_tombstones WHERE deleted_at < NOW(6) - INTERVAL %s DAY",
+                   (TOMBSTONE_RETENTION_DAYS,))
+    assign_task_uids(cursor)
+
+
+def ensure_schema(pool):
+    """Migrate and prune the pool's database once per pool; returns the versions applied"""
+    if pool.schema_ready:
+        return []
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        applied = migrate_schema(cursor)
+        prune_shared_tables(cursor)
+        conn.commit()
+        cursor.close()
+    pool.schema_ready = True
+    return applied
+
+
+def max_allowed_packet(cursor):
+    cursor.execute("SELECT @@max_allowed_packet")
+    return int(cursor.fetchone()[0])
+
+
+def escaped_row_size(row):
+    """Upper bound on the bytes a row adds to a VALUES list once escaped and quoted"""
+    # Escaping at most doubles a value; quotes and separators add 4 bytes each
+    return sum(2 * len(str(value).encode("utf-8")) + 4 for value in row) + 4
+
+
+def bulk_upsert(cursor, table, columns, update_columns, rows, packet_limit):
+    """Insert or update rows with multi-row INSERT statements sized to packet_limit
+
+    Rows are grouped so each statement, after escaping, stays below the
+    server's max_allowed_packet. Returns the number of statements sent.
+    """
+    head = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+    tail = (" ON DUPLICATE KEY UPDATE "
+            + ", ".join(f"{column} = VALUES({column})" for column in update_columns)
+            + ", row_version = row_version + 1")
+    placeholder = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    budget = packet_limit - len(head) - len(tail) - BULK_STATEMENT_MARGIN
+    statements = 0
+    chunk, size = [], 0
+
+    def send():
+        cursor.execute(head + ", ".join([placeholder] * len(chunk)) + tail,
+                       [value for row in chunk for value in row])
+
+    for row in rows:
+        row_size = escaped_row_size(row)
+        if chunk and size + row_size > budget:
+            send()
+            statements += 1
+            chunk, size = [], 0
+        chunk.append(row)
+        size += row_size
+    if chunk:
+        send()
+        statements += 1
+    return statements
+
+
+def merge_fields(local, base, server, local_time, server_time):
+    """Resolve a task changed both locally and on the server, field by field
+
+    A field changed on one side only takes that side's value. A field both
+    sides changed to different values goes to the later writer: local_time
+    (when the local change was made) against server_time (the row's
+    updated_at), both epoch seconds, with ties going to the local change.
+    Without a base every differing field counts as changed on both sides.
+    Returns the merged task and a (field, local, server, kept) tuple per
+    field both sides changed.
+    """
+    values, conflicts = [], []
+    for field in TASK_FIELDS:
+        mine, theirs = getattr(local, field), getattr(server, field)
+        old = getattr(base, field) if base is not None else None
+        if mine == theirs or (base is not None and theirs == old):
+            value = mine
+        elif base is not None and mine == old:
+            value = theirs
+        else:
+            value = mine if local_time >= server_time else theirs
+            conflicts.append((field, mine, theirs, value))
+        values.append(value)
+    name, iso_date, priority = values
+    return Task.from_iso(name, iso_date, priority, local.task_id), conflicts
+
+
+def lock_task_row(cursor, task_uid):
+    """The server's (row_version, task, updated_at epoch) for task_uid, locked until commit, or None"""
+    cursor.execute("SELECT task_name, due_date, priority, row_version, UNIX_TIMESTAMP(updated_at) "
+                   "FROM tasks WHERE task_uid = %s FOR UPDATE", (task_uid,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    name, due_date, priority, version, updated_at = row
+    return version, Task.from_iso(name, str(due_date), priority, task_uid), float(updated_at)
+
+
+def deleted_at(cursor, task_uid):
+    """When task_uid was deleted on the server (epoch seconds), or None"""
+    cursor.execute("SELECT UNIX_TIMESTAMP(deleted_at) FROM task_tombstones WHERE task_uid = %s", (task_uid,))
+    row = cursor.fetchone()
+    return float(row[0]) if row is not None else None
+
+
+def resolve_upsert(cursor, task, base, changed_at, log_conflict):
+    """Write task over a row whose version moved on since base; returns (row_version, task) or None"""
+    server = lock_task_row(cursor, task.task_id)
+    if server is None:
+        # Another client deleted it; the later of the delete and this edit wins
+        deleted = deleted_at(cursor, task.task_id)
+        if deleted is not None:
+            log_conflict(task.task_id, "deleted", False, True, deleted > changed_at)
+            if deleted > changed_at:
+                return None
+            cursor.execute("DELETE FROM task_tombstones WHERE task_uid = %s", (task.task_id,))
+        version = (base[0] if base is not None else 0) + 1
+        cursor.execute("INSERT INTO tasks (task_uid, task_name, due_date, priority, row_version) "
+                       "VALUES (%s, %s, %s, %s, %s)", task_params(task) + (version,))
+        return version, task
+
+    version, server_task, server_time = server
+    merged, conflicts = merge_fields(task, base[1] if base is not None else None, server_task,
+                                     changed_at, server_time)
+    for field, mine, theirs, kept in conflicts:
+        log_conflict(task.task_id, field, mine, theirs, kept)
+    if merged.same_values(server_task):
+        return version, server_task
+    cursor.execute(CAS_UPDATE_TASK_SQL, task_values(merged) + (task.task_id, version))
+    return version + 1, merged
+
+
+def push_task_changes(cursor, upserts, removes, log_conflict, packet_limit=None):
+    """Write local task changes with compare-and-swap on row_version
+
+    upserts maps task_uid -> (task, base, changed_at) and removes maps
+    task_uid -> (base, changed_at). base is the (row_version, task) this
+    client last saw on the server, or None if it never saw the row, and
+    changed_at is when the local change was made (epoch seconds). A row whose
+    version moved on since base is locked and merged with merge_fields, and
+    every conflict goes to log_conflict(task_uid, field, local, server, kept).
+    Rows the server does not have yet go out in bulk statements sized to
+    packet_limit. Rows nobody here changed are never touched.
+
+    Returns {task_uid: (row_version, task), or None once deleted} for every
+    row written, and the task_uids whose outcome differs from the local change.
+    """
+    results, overruled = {}, set()
+
+    # Rows never seen on the server are inserted in bulk unless they turn out to exist
+    unseen = [task_uid for task_uid, (_, base, _) in upserts.items() if base is None]
+    existing = set()
+    for start in range(0, len(unseen), BULK_ID_CHUNK):
+        chunk = unseen[start:start + BULK_ID_CHUNK]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cursor.execute(f"SELECT task_uid FROM tasks WHERE task_uid IN ({placeholders})", chunk)
+        existing.update(task_uid for (task_uid,) in cursor.fetchall())
+    fresh = [upserts[task_uid][0] for task_uid in unseen if task_uid not in existing]
+    if fresh:
+        if packet_limit is None:
+            packet_limit = max_allowed_packet(cursor)
+        bulk_upsert(cursor, "tasks", ("task_uid", "task_name", "due_date", "priority"),
+                    ("task_name", "due_date", "priority"), map(task_params, fresh), packet_limit)
+        results.update((task.task_id, (1, task)) for task in fresh)
+
+    for task_uid, (task, base, changed_at) in upserts.items():
+        if task_uid in results:
+            continue
+        if base is not None:
+            cursor.execute(CAS_UPDATE_TASK_SQL, task_values(task) + (task_uid, base[0]))
+            if cursor.rowcount == 1:
+                results[task_uid] = (base[0] + 1, task)
+                continue
+        results[task_uid] = resolve_upsert(cursor, task, base, changed_at, log_conflict)
+        if results[task_uid] is None or not results[task_uid][1].same_values(task):
+            overruled.add(task_uid)
+
+    deleted = []
+    for task_uid, (base, changed_at) in removes.items():
+        if base is not None:
+            cursor.execute("DELETE FROM tasks WHERE task_uid = %s AND row_version = %s", (task_uid, base[0]))
+            if cursor.rowcount == 1:
+                deleted.append(task_uid)
+                results[task_uid] = None
+                continue
+        server = lock_task_row(cursor, task_uid)
+        if server is not None:
+            # Edited elsewhere since this client saw it; the later of the edit and this delete wins
+            version, server_task, server_time = server
+            if base is not None:
+                log_conflict(task_uid, "deleted", True, False, changed_at >= server_time)
+            if server_time > changed_at:
+                results[task_uid] = (version, server_task)
+                overruled.add(task_uid)
+                continue
+            cursor.execute("DELETE FROM tasks WHERE task_uid = %s", (task_uid,))
+            deleted.append(task_uid)
+        results[task_uid] = None
+    if deleted:
+        values = ", ".join(["(%s)"] * len(deleted))
+        cursor.execute(f"INSERT INTO task_tombstones (task_uid) VALUES {values} "
+                       f"ON DUPLICATE KEY UPDATE deleted_at = CURRENT_TIMESTAMP(6)", deleted)
+    return results, overruled
+
+
+def push_daily_tasks(cursor, synced, current, packet_limit=None):
+    """Move daily_tasks from the synced list to the current one, touching only changed positions
+
+    synced is None when the shared table's contents are unknown; it is then
+    rewritten in full with bulk statements. Returns the number of rows written.
+    """
+    if synced is None:
+        if packet_limit is None:
+            packet_limit = max_allowed_packet(cursor)
+        cursor.execute("DELETE FROM daily_tasks")
+        bulk_upsert(cursor, "daily_tasks", ("position", "task_text"), ("task_text",),
+                    enumerate(current), packet_limit)
+        return len(current)
+    changed = [(position, text) for position, text in enumerate(current)
+               if position >= len(synced) or synced[position] != text]
+    if changed:
+        cursor.executemany(UPSERT_DAILY_TASK_SQL, changed)
+    if len(current) < len(synced):
+        cursor.execute("DELETE FROM daily_tasks WHERE position >= %s", (len(current),))
+    return len(changed)
+
+
+class PulledChanges:
+    """Rows changed on the server since a watermark, as read by pull_changes()
+
+    full is set when everything was read instead, because there was no
+    watermark or it is older than the tombstones go back; tasks missing from
+    a full pull were deleted.
+    """
+
+    def __init__(self, full, watermark):
+        self.full = full
+        self.watermark = watermark  # newest updated_at/deleted_at seen
+        self.tasks = []
+        self.versions = {}          # task_uid -> row_version of each pulled task
+        self.deleted_ids = []
+        self.daily_rows = []        # (position, text) in position order
+        self.daily_count = 0
+
+    def saw(self, timestamp):
+        if self.watermark is None or timestamp > self.watermark:
+            self.watermark = timestamp
+
+
+def pull_changes(cursor, watermark):
+    """Read tasks, deletes and daily tasks changed since watermark (None reads everything)
+
+    Rows are re-read from SYNC_PULL_OVERLAP seconds before the watermark so a
+    transaction that committed after a later one is not missed; applying a
+    row twice is harmless.
+    """
+    cursor.execute("SELECT NOW(6)")
+    now = cursor.fetchone()[0]
+    full = watermark is None or watermark < now - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    changes = PulledChanges(full, watermark)
+    since = () if full else (watermark - timedelta(seconds=SYNC_PULL_OVERLAP),)
+    changed = "" if full else " AND updated_at > %s"
+
+    cursor.execute("SELECT task_uid, task_name, due_date, priority, row_version, updated_at FROM tasks "
+                   "WHERE task_uid IS NOT NULL" + changed, since)
+    for task_uid, name, due_date, priority, version, updated_at in cursor.fetchall():
+        changes.tasks.append(Task.from_iso(name, str(due_date), priority, task_uid))
+        changes.versions[task_uid] = version
+        changes.saw(updated_at)
+
+    if not full:
+        cursor.execute("SELECT task_uid, deleted_at FROM task_tombstones WHERE deleted_at > %s", since)
+        for task_uid, deleted_at in cursor.fetchall():
+            changes.deleted_ids.append(task_uid)
+            changes.saw(deleted_at)
+
+    cursor.execute("SELECT position, task_text, updated_at FROM daily_tasks"
+                   + ("" if full else " WHERE updated_at > %s") + " ORDER BY position", since)
+    for position, text, updated_at in cursor.fetchall():
+        changes.daily_rows.append((position, text))
+        changes.saw(updated_at)
+    cursor.execute("SELECT COUNT(*) FROM daily_tasks")
+    changes.daily_count = cursor.fetchone()[0]
+    return changes
+
+
+class PullRequest:
+    """Asks the sync worker for what changed on the server since watermark
+
+    submitted is the worker's push count when the pull was requested; the
+    worker fills in changes and daily_tasks (the server's daily list, or None
+    if it cannot be worked out) before handing the request back.
+    """
+
+    def __init__(self, pool, watermark, submitted):
+        self.pool = pool
+        self.watermark = watermark
+        self.submitted = submitted
+        self.changes = None
+        self.daily_tasks = None
+
+
+class MySQLOutbox:
+    """Durable queue of task changes not yet on the MySQL server
+
+    Changes are appended to a JSON-lines file (and fsynced) as they are made,
+    and removed once the push carrying them commits. Changes made while the
+    server is unreachable, or left over when the app closed, are therefore
+    replayed in order later. The file is read and written under lock (the
+    data directory FileLock), so other running instances can share it.
+    """
+
+    def __init__(self, path, lock):
+        self.path = path
+        self.lock = lock
+        self.depth = len(self.read())  # records waiting, as of the last read or write
+
+    def append(self, records):
+        if not records:
+            return
+        text = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        with self.lock:
+            with open(self.path, "ab+") as f:
+                # Start on a fresh line if a crash left a torn record at the end
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        text = b"\n" + text
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            self.depth += len(records)
+
+    def read(self):
+        """Every waiting record, oldest first"""
+        with self.lock:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                lines = []
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # Torn by a crash mid-append; that change never returned
+        self.depth = len(records)
+        return records
+
+    def acknowledge(self, record_ids):
+        """Drop records that reached the server"""
+        record_ids = set(record_ids)
+        with self.lock:
+            remaining = [record for record in self.read() if record["id"] not in record_ids]
+            atomic_write(self.path, "".join(json.dumps(record) + "\n" for record in remaining))
+            self.depth = len(remaining)
+
+
+def outbox_records(daily_tasks, upserts, removed, base, submitted):
+    """Outbox records for one round of local changes
+
+    base maps task IDs to the (row_version, task) last seen on the server;
+    each record carries its task's entry so the push can compare and swap.
+    """
+    def base_row(task_id):
+        entry = base.get(task_id)
+        return None if entry is None else [entry[0], entry[1].to_row()]
+
+    now = time.time()
+    records = ([{"op": "upsert", "task": task.to_row(), "base": base_row(task.task_id)} for task in upserts]
+               + [{"op": "remove", "task_id": task_id, "base": base_row(task_id)} for task_id in removed])
+    if daily_tasks is not None:
+        records.append({"op": "daily", "tasks": list(daily_tasks)})
+    for record in records:
+        record.update(id=uuid.uuid4().hex, at=now, round=submitted)
+    return records
+
+
+class SyncBatch:
+    """Outbox records folded into the newest state of each task they touch
+
+    Each task keeps the base of its oldest record (what the server had
+    before any of these changes) and the time of its newest one. round is
+    the newest submission round folded in.
+
+    Records carry the base the Tk thread knew when they were queued, which
+    misses pushes of the same task still in flight. committed maps task_uid
+    to the (row_version, task) this client itself last wrote; where that is
+    newer it is used instead, so the client's own earlier push is never
+    mistaken for another client's edit.
+    """
+
+    def __init__(self, committed=None):
+        self.committed = committed or {}
+        self.record_ids = []
+        self.upserts = {}       # task_uid -> (task, base, changed_at)
+        self.removes = {}       # task_uid -> (base, changed_at)
+        self.daily_tasks = None
+        self.round = 0
+
+    def __len__(self):
+        """Task rows this batch writes"""
+        return len(self.upserts) + len(self.removes)
+
+    def add_record(self, record):
+        self.record_ids.append(record["id"])
+        self.round = max(self.round, record.get("round", 0))
+        op = record["op"]
+        if op == "daily":
+            self.daily_tasks = record["tasks"]
+            return
+        task_id = record["task"][3] if op == "upsert" else record["task_id"]
+        if task_id in self.upserts:
+            base = self.upserts.pop(task_id)[1]
+        elif task_id in self.removes:
+            base = self.removes.pop(task_id)[0]
+        else:
+            base = None if record["base"] is None else (record["base"][0], Task.coerce(record["base"][1]))
+            own = self.committed.get(task_id)
+            if own is not None and (base is None or own[0] > base[0]):
+                base = own
+        if op == "upsert":
+            self.upserts[task_id] = (Task.coerce(record["task"]), base, record["at"])
+        else:
+            self.removes[task_id] = (base, record["at"])
+
+
+class MySQLSyncWorker:
+    """Pushes task changes to MySQL and pulls peers' changes on a background thread
+
+    submit() writes a round of changes to the outbox and returns at once.
+    The worker replays the outbox in order, OUTBOX_BATCH_RECORDS records per
+    transaction, and reports on the Tk thread through on_state(state,
+    backlog, error), where state is "waiting", "syncing", "idle" or "failed"
+    and backlog is the number of outbox records not yet on the server. After
+    a failure it backs off (SYNC_RETRY_MIN doubling up to SYNC_RETRY_MAX),
+    replaying again only while the health monitor's cached status is
+    "running"; retry_now() skips the wait once the server is back.
+
+    Task rows are written with compare-and-swap on row_version (see
+    push_task_changes). After each commit on_pushed(results, overruled,
+    round) gets the versions written, the tasks where a conflict went the
+    server's way, and the newest submission round in the push; conflicts are
+    appended to the conflict_log file as JSON lines.
+
+    request_pull() queues a pull, which runs once the outbox is empty; its
+    PullRequest is handed to on_pulled on the Tk thread. Nothing is pushed or
+    pulled while sharing is turned off (set_enabled); the outbox keeps it.
+
+    The schema is migrated (ensure_schema) before the first push or pull
+    against a pool, and on_migrated(versions) is told of any versions applied.
+    """
+
+    STOP = object()
+    WAKE = object()
+    RETRY = object()
+
+    def __init__(self, root, outbox, conflict_log, on_state, on_pushed, on_pulled, on_migrated, health):
+        self.root = root
+        self.outbox = outbox
+        self.conflict_log = conflict_log
+        self.on_state = on_state
+        self.on_pushed = on_pushed
+        self.on_pulled = on_pulled
+        self.on_migrated = on_migrated
+        self.health = health
+        self.pool = None                # set by the Tk thread with each submit or pull
+        self.queue = queue.Queue()
+        self.submitted = 0              # rounds submitted so far (only touched on the Tk thread)
+        self.synced_daily_tasks = None  # daily_tasks contents on the server, None if unknown
+        self.enabled = threading.Event()
+        self.committed = {}             # task_uid -> (row_version, task) written by this worker
+        self.thread = threading.Thread(target=self.run, name="mysql-sync", daemon=True)
+        self.thread.start()
+
+    def submit(self, pool, daily_tasks, upserts, removed, base):
+        """Queue a round of local changes; base is the Tk thread's map of rows last seen on the server"""
+        self.pool = pool
+        self.submitted += 1
+        self.outbox.append(outbox_records(daily_tasks, upserts, removed, base, self.submitted))
+        self.queue.put(self.WAKE)
+
+    def set_enabled(self, enabled):
+        """Follow the sharing setting; the outbox is replayed once it is turned back on"""
+        if enabled:
+            self.enabled.set()
+            self.queue.put(self.WAKE)
+        else:
+            self.enabled.clear()
+
+    def retry_now(self):
+        """Replay the outbox without waiting out the backoff, e.g. once the server is back"""
+        self.queue.put(self.RETRY)
+
+    def request_pull(self, pool, watermark):
+        self.pool = pool
+        self.queue.put(PullRequest(pool, watermark, self.submitted))
+
+    def stop(self, timeout=SYNC_STOP_TIMEOUT):
+        """Push whatever is waiting unless the server is known to be down, then end the thread
+
+        Called on the Tk thread, which keeps handling events while it waits:
+        the worker's posts block until the Tk thread runs them.
+        """
+        self.queue.put(self.STOP)
+        deadline = time.monotonic() + timeout
+        while self.thread.is_alive() and time.monotonic() < deadline:
+            self.root.update()
+            self.thread.join(0.05)
+
+    def run(self):
+        failures = 0
+        retry_at = 0
+        stopping = False
+        if self.outbox.depth:
+            self.post(self.on_state, "waiting", self.outbox.depth, None)
+        while not stopping:
+            # Backoff only runs out while sharing is on; set_enabled() wakes the worker
+            if failures and self.enabled.is_set():
+                timeout = max(0, retry_at - time.monotonic())
+            else:
+                timeout = MYSQL_IDLE_TIMEOUT
+            try:
+                items = [self.queue.get(timeout=timeout)]
+            except queue.Empty:
+                items = []
+            while True:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if not items and not failures:
+                # Idle tick: a quiet pool should not hold stale sockets until the next sync
+                if self.pool is not None:
+                    self.pool.prune()
+                continue
+
+            pull = None
+            for item in items:
+                if item is self.STOP:
+                    stopping = True
+                elif item is self.RETRY:
+                    retry_at = 0
+                elif isinstance(item, PullRequest):
+                    pull = item
+
+            if not self.enabled.is_set():
+                # Sharing is off; changes wait in the outbox until it is turned back on
+                continue
+
+            if failures:
+                # Whatever is waiting stays in the outbox for the next start
+                if stopping:
+                    break
+                if time.monotonic() < retry_at:
+                    self.post(self.on_state, "failed", self.outbox.depth, None)
+                    continue
+                if self.health.current() != "running":
+                    failures += 1
+                    retry_at = time.monotonic() + self.retry_delay(failures)
+                    self.post(self.on_state, "failed", self.outbox.depth, None)
+                    continue
+
+            if self.pool is None:
+                continue
+            try:
+                if self.replay():
+                    self.post(self.on_state, "idle", 0, None)
+                failures = 0
+            except Exception as e:
+                print(f"Error syncing to MySQL: {e}")
+                self.health.refresh()
+                failures += 1
+                retry_at = time.monotonic() + self.retry_delay(failures)
+                self.post(self.on_state, "failed", self.outbox.depth, str(e))
+                continue
+
+            # Pulls wait for local changes to go out first, so they never read older state back
+            if pull is not None and not stopping:
+                try:
+                    self.pull(pull)
+                    self.post(self.on_pulled, pull)
+                except Exception as e:
+                    print(f"Error syncing from MySQL: {e}")
+                    self.post(self.on_state, "failed", self.outbox.depth, str(e))
+
+    @staticmethod
+    def retry_delay(failures):
+        return min(SYNC_RETRY_MAX, SYNC_RETRY_MIN * 2 ** (failures - 1))
+
+    def replay(self):
+        """Push the outbox oldest first, one transaction per batch; returns whether anything was sent"""
+        sent = False
+        while True:
+            records = self.outbox.read()
+            if not records:
+                return sent
+            self.post(self.on_state, "syncing", len(records), None)
+            batch = SyncBatch(self.committed)
+            for record in records[:OUTBOX_BATCH_RECORDS]:
+                batch.add_record(record)
+            self.push(self.pool, batch)
+            self.outbox.acknowledge(batch.record_ids)
+            sent = True
+
+    def push(self, pool, batch):
+        started = time.perf_counter()
+        synced = self.synced_daily_tasks
+        if self.migrate(pool):
+            # The migration may have cleared daily_tasks
+            synced = None
+        conflicts = []
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            results, overruled = push_task_changes(cursor, batch.upserts, batch.removes,
+                                                   lambda *conflict: conflicts.append(conflict))
+            rows = len(results)
+            if batch.daily_tasks is not None:
+                rows += push_daily_tasks(cursor, synced, batch.daily_tasks)
+            conn.commit()
+            cursor.close()
+        if batch.daily_tasks is not None:
+            self.synced_daily_tasks = batch.daily_tasks
+        for task_uid, result in results.items():
+            if result is None:
+                self.committed.pop(task_uid, None)
+            else:
+                self.committed[task_uid] = result
+        if conflicts:
+            self.write_conflicts(conflicts)
+        self.post(self.on_pushed, results, overruled, batch.round)
+        if rows >= SYNC_REPORT_ROWS:
+            elapsed = time.perf_counter() - started
+            rate = rows / elapsed if elapsed > 0 else float(rows)
+            print(f"MySQL push: {rows} rows in {elapsed:.2f}s ({rate:.0f} rows/sec)")
+
+    def write_conflicts(self, conflicts):
+        now = datetime.now().isoformat(timespec="seconds")
+        try:
+            with open(self.conflict_log, "a", encoding="utf-8") as f:
+                for task_uid, field, local, server, kept in conflicts:
+                    f.write(json.dumps({"time": now, "task_id": task_uid, "field": field,
+                                        "local": local, "server": server, "kept": kept}) + "\n")
+        except OSError as e:
+            print(f"Error writing MySQL conflict log: {e}")
+        print(f"Resolved {len(conflicts)} MySQL sync conflict(s); see {self.conflict_log}")
+
+    def migrate(self, pool):
+        applied = ensure_schema(pool)
+        if applied:
+            self.post(self.on_migrated, applied)
+        return applied
+
+    def pull(self, request):
+        self.migrate(request.pool)
+        with request.pool.connection() as conn:
+            cursor = conn.cursor()
+            changes = pull_changes(cursor, request.watermark)
+            cursor.close()
+        request.changes = changes
+
+        # Work out the server's daily list from the last one known and the changed positions
+        daily_tasks = [] if changes.full else self.synced_daily_tasks
+        if daily_tasks is not None:
+            daily_tasks = list(daily_tasks)
+            for position, text in changes.daily_rows:
+                if position < len(daily_tasks):
+                    daily_tasks[position] = text
+                elif position == len(daily_tasks):
+                    daily_tasks.append(text)
+                else:
+                    daily_tasks = None
+                    break
+        if daily_tasks is not None and len(daily_tasks) >= changes.daily_count:
+            daily_tasks = daily_tasks[:changes.daily_count]
+            self.synced_daily_tasks = daily_tasks
+        else:
+            daily_tasks = None
+        request.daily_tasks = daily_tasks
+
+    def post(self, callback, *args):
+        """Call callback on the Tk thread, unless the window is already gone"""
+        try:
+            self.root.after(0, callback, *args)
+        except Exception:
+            pass
+
+
+class MySQLHealthMonitor:
+    """Probes MySQL on a background thread and caches the result
+
+    probe() (a blocking status check returning "running", "access_denied",
+    "not_running" or "not_installed") never runs on the Tk thread. While
+    active it runs every ttl seconds; otherwise only when refresh() asks, or
+    when current() finds the cached result older than ttl. status is the
+    last result, or None before the first probe finishes, and on_change(status)
+    is called on the Tk thread whenever it changes.
+    """
+
+    def __init__(self, root, probe, on_change, ttl=MYSQL_STATUS_TTL):
+        self.root = root
+        self.probe = probe
+        self.on_change = on_change
+        self.ttl = ttl
+        self.active = False
+        self.status = None
+        self.checked_at = None
+        self.stopped = False
+        self.wanted = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="mysql-health", daemon=True)
+        self.thread.start()
+
+    def current(self):
+        """The cached status, at once; a stale one is refreshed in the background"""
+        if self.checked_at is None or time.monotonic() - self.checked_at > self.ttl:
+            self.refresh()
+        return self.status
+
+    def probed_since(self, moment):
+        """Whether the cached status comes from a probe started at or after moment (time.monotonic())"""
+        return self.checked_at is not None and self.checked_at >= moment
+
+    def age(self):
+        """Seconds since the cached status was probed, or None"""
+        if self.checked_at is None:
+            return None
+        return time.monotonic() - self.checked_at
+
+    def refresh(self):
+        self.wanted.set()
+
+    def stop(self):
+        self.stopped = True
+        self.wanted.set()
+
+    def run(self):
+        while True:
+            self.wanted.wait(self.ttl if self.active else None)
+            if self.stopped:
+                return
+            self.wanted.clear()
+            started = time.monotonic()
+            try:
+                status = self.probe()
+            except Exception as e:
+                print(f"Error checking MySQL status: {e}")
+                continue
+            changed = status != self.status
+            self.status, self.checked_at = status, started
+            if changed:
+                try:
+                    self.root.after(0, self.on_change, status)
+                except Exception:
+                    pass
@@ -0,0 +1,55 @@
+import time
+from contextlib import nullcontext
+
+
+class PersistScheduler:
+    """Coalesces file writes on the Tk thread
+
+    Callers mark a file dirty together with the function that writes it. The
+    write runs once the edits pause for delay_ms (or at the latest max_delay_ms
+    after the first pending edit), so a burst of edits becomes a single write.
+    Writers are expected to go through todo_store.atomic_write so a crash
+    mid-write never leaves a half-written file. flush() writes everything
+    pending immediately and is called on shutdown. Writes run under lock (the
+    data directory FileLock) when one is given.
+    """
+
+    def __init__(self, root, delay_ms=500, max_delay_ms=3000, lock=None):
+        self.root = root
+        self.lock = lock or nullcontext()
+        self.delay_ms = delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.pending = {}       # key -> writer, in the order first marked dirty
+        self.timer = None
+        self.first_dirty = None
+
+    def schedule(self, key, writer):
+        """Mark key dirty; writer() is called once at the next flush"""
+        self.pending[key] = writer
+        now = time.monotonic()
+        if self.first_dirty is None:
+            self.first_dirty = now
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+        # Debounce, but never hold a write back longer than max_delay_ms
+        waited_ms = int((now - self.first_dirty) * 1000)
+        delay = max(0, min(self.delay_ms, self.max_delay_ms - waited_ms))
+        self.timer = self.root.after(delay, self.flush)
+
+    def is_dirty(self, key):
+        """Whether a write of key is still pending"""
+        return key in self.pending
+
+    def flush(self):
+        """Run every pending write now"""
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+            self.timer = None
+        self.first_dirty = None
+        pending, self.pending = self.pending, {}
+        with self.lock:
+            for key, writer in pending.items():
+                try:
+                    writer()
+                except Exception as e:
+                    print(f"Error writing {key}: {e}")
@@ -0,0 +1,1174 @@
+import bisect
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime
+from operator import attrgetter
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no fcntl; byte-range locks through msvcrt are used instead
+    fcntl = None
+    import msvcrt
+
+# Journal is folded into the snapshot once it grows past this many bytes
+JOURNAL_COMPACT_BYTES = 256 * 1024
+
+
+def is_iso_date(date_str):
+    """Whether a date string is in the yyyy-mm-dd storage format"""
+    return len(date_str) == 10 and date_str[4] == "-" and date_str[7] == "-"
+
+
+def date_ordinal(date_str):
+    """Parse a yyyy-mm-dd (storage) or mm-dd-yyyy (display) date into a proleptic Gregorian ordinal"""
+    try:
+        # Fast paths for the stored and the displayed format
+        if is_iso_date(date_str):
+            return date(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10])).toordinal()
+        if len(date_str) == 10 and date_str[2] == "-" and date_str[5] == "-":
+            return date(int(date_str[6:10]), int(date_str[0:2]), int(date_str[3:5])).toordinal()
+    except ValueError:
+        pass
+    return datetime.strptime(date_str, "%m-%d-%Y").toordinal()
+
+
+def new_task_id():
+    """Generate a persistent unique task ID"""
+    return uuid.uuid4().hex
+
+
+class Task:
+    """A single task whose date and priority are parsed once and cached for sorting
+
+    due_date is the mm-dd-yyyy form shown in the UI; files and databases store
+    the ISO yyyy-mm-dd form (iso_date) so that string order is date order.
+    Every task carries a persistent unique ID; two tasks are the same task only
+    if their IDs match, even when their name, date and priority are identical.
+    """
+
+    __slots__ = ("task_id", "name", "due_date", "priority", "due_ordinal", "sort_key")
+
+    def __init__(self, name, due_date, priority, due_ordinal=None, task_id=None):
+        self.task_id = task_id or new_task_id()
+        self.name = str(name)
+        self.due_date = str(due_date)
+        self.priority = int(priority)
+        self.due_ordinal = date_ordinal(self.due_date) if due_ordinal is None else due_ordinal
+        if len(self.due_date) != 10 or self.due_date[2] != "-":
+            # Normalize ISO and loose dates such as 1-3-2025 to the displayed mm-dd-yyyy
+            self.due_date = date.fromordinal(self.due_ordinal).strftime("%m-%d-%Y")
+        # Default order: earliest due date first, higher priority first
+        self.sort_key = (self.due_ordinal, -self.priority)
+
+    @classmethod
+    def coerce(cls, task):
+        """Build a Task from a Task, or a tuple/list of (name, date, priority[, id])"""
+        if isinstance(task, cls):
+            return task
+        task_id = task[3] if len(task) > 3 else None
+        return cls(task[0], task[1], task[2], task_id=task_id)
+
+    @classmethod
+    def from_iso(cls, name, iso_date, priority, task_id=None):
+        """Build a Task from a yyyy-mm-dd date"""
+        due = date.fromisoformat(iso_date)
+        return cls(name, due.strftime("%m-%d-%Y"), priority, due.toordinal(), task_id)
+
+    @property
+    def iso_date(self):
+        return date.fromordinal(self.due_ordinal).isoformat()
+
+    def values(self):
+        """Values shown in the Treeview columns"""
+        return (self.name, self.due_date, self.priority)
+
+    def same_values(self, other):
+        """Whether two tasks have the same name, date and priority"""
+        return (self.name, self.due_ordinal, self.priority) == (other.name, other.due_ordinal, other.priority)
+
+    def to_row(self):
+        """Fields as written to disk, with the date in ISO form"""
+        return [self.name, self.iso_date, str(self.priority), self.task_id]
+
+    def __eq__(self, other):
+        if not isinstance(other, Task):
+            return NotImplemented
+        return self.task_id == other.task_id
+
+    def __hash__(self):
+        return hash(self.task_id)
+
+    def __repr__(self):
+        return f"Task({self.name!r}, {self.due_date!r}, {self.priority}, task_id={self.task_id!r})"
+
+
+task_sort_key = attrgetter("sort_key")
+
+# Precomputed per-task keys for the Treeview column sorts
+COLUMN_SORT_KEYS = {
+    "Task": attrgetter("name"),
+    "Due Date": attrgetter("due_ordinal"),
+    "Priority": attrgetter("priority"),
+}
+
+
+def atomic_write(path, text, tmp_suffix=".tmp", replace=True):
+    """Write text to a temp file and rename it over path so readers never see a partial file"""
+    tmp_path = path + tmp_suffix
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    if replace:
+        os.replace(tmp_path, path)
+    return tmp_path
+
+
+def file_signature(path):
+    """(mtime, size, inode) of a file, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class FileLock:
+    """Cross-process advisory lock held on a lock file
+
+    Used as a context manager around reads and writes of the data files so two
+    running instances never interleave them. It is reentrant within a process
+    and also serializes threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.handle = None
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if self.depth == 0:
+            try:
+                self.acquire()
+            except BaseException:
+                self.thread_lock.release()
+                raise
+        self.depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self.depth -= 1
+        if self.depth == 0:
+            self.release()
+        self.thread_lock.release()
+
+    def acquire(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.handle = open(self.path, "a+")
+        if fcntl is not None:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX)
+            return
+        self.handle.seek(0)
+        while True:
+            try:
+                # LK_LOCK gives up after about 10 seconds; keep waiting
+                msvcrt.locking(self.handle.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def release(self):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+            else:
+                self.handle.seek(0)
+                msvcrt.locking(self.handle.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self.handle.close()
+            self.handle = None
+
+
+class TaskBuckets:
+    """Overdue, due-today and upcoming tasks kept as three sorted lists
+
+    Each list is ordered by the task sort key and updated with binary search on
+    add and remove. When the day rolls over only the tasks at the date boundary
+    move between lists.
+    """
+
+    def __init__(self, tasks, today_ordinal):
+        """Split an already sorted task list around today"""
+        self.today_ordinal = today_ordinal
+        start = bisect.bisect_left(tasks, (today_ordinal,), key=task_sort_key)
+        end = bisect.bisect_left(tasks, (today_ordinal + 1,), key=task_sort_key)
+        self.overdue = tasks[:start]
+        self.today = tasks[start:end]
+        self.upcoming = tasks[end:]
+
+    def bucket_for(self, task):
+        if task.due_ordinal < self.today_ordinal:
+            return self.overdue
+        if task.due_ordinal == self.today_ordinal:
+            return self.today
+        return self.upcoming
+
+    def all(self):
+        return self.overdue + self.today + self.upcoming
+
+    def __len__(self):
+        return len(self.overdue) + len(self.today) + len(self.upcoming)
+
+    def index_in(self, bucket, task):
+        """Position of task in its bucket, or -1"""
+        index = bisect.bisect_left(bucket, task.sort_key, key=task_sort_key)
+        while index < len(bucket) and bucket[index].sort_key == task.sort_key:
+            if bucket[index] == task:
+                return index
+            index += 1
+        return -1
+
+    def __contains__(self, task):
+        return self.index_in(self.bucket_for(task), task) != -1
+
+    def add(self, task):
+        bisect.insort(self.bucket_for(task), task, key=task_sort_key)
+
+    def remove(self, task):
+        """Remove a task, raising ValueError if it is not present"""
+        bucket = self.bucket_for(task)
+        index = self.index_in(bucket, task)
+        if index == -1:
+            raise ValueError("Task not found")
+        del bucket[index]
+
+    def roll_to(self, today_ordinal):
+        """Move the tasks at the date boundary when the current day changes"""
+        if today_ordinal == self.today_ordinal:
+            return
+        if today_ordinal < self.today_ordinal:
+            # The clock went backwards; re-split from scratch
+            self.__init__(self.all(), today_ordinal)
+            return
+        self.today_ordinal = today_ordinal
+        # Everything that was due "today" is now overdue and sorts after the old overdue tasks
+        self.overdue.extend(self.today)
+        # Upcoming tasks at the front of the list reach today (or skip straight to overdue)
+        start = bisect.bisect_left(self.upcoming, (today_ordinal,), key=task_sort_key)
+        end = bisect.bisect_left(self.upcoming, (today_ordinal + 1,), key=task_sort_key)
+        self.overdue.extend(self.upcoming[:start])
+        self.today = self.upcoming[start:end]
+        del self.upcoming[:end]
+
+    def top(self, category, count):
+        """First count tasks of "overdue", "today" or "upcoming" in display order"""
+        return getattr(self, category)[:count]
+
+
+def parse_task_line(line, seen_ids):
+    """Parse a "name | date | priority | id" line, or None if it is malformed
+
+    Lines written before tasks had IDs, and lines whose ID was already seen
+    (e.g. copied by hand), get a fresh ID. Lines with an old mm-dd-yyyy date
+    are read as is. The second value says whether the line needs upgrading so
+    the caller can write the file back once in the current format.
+    """
+    parts = line.strip().split(" | ")
+    if len(parts) == 4 and parts[3] not in seen_ids:
+        task_id, upgraded = parts[3], False
+    elif len(parts) in (3, 4):
+        task_id, upgraded = new_task_id(), True
+    else:
+        return None, False
+    seen_ids.add(task_id)
+    upgraded = upgraded or not is_iso_date(parts[1])
+    return Task(parts[0], parts[1], parts[2], task_id=task_id), upgraded
+
+
+def rows_by_id(tasks):
+    """Task ID -> on-disk row, to tell which tasks changed between two versions of a file"""
+    return {task.task_id: tuple(task.to_row()) for task in tasks}
+
+
+def task_id_of(task):
+    """Accept either a Task or a bare task ID"""
+    return task.task_id if isinstance(task, Task) else task
+
+
+class TaskStore:
+    """Keeps the task list resident in memory and writes through to the task file
+
+    Tasks are indexed by their persistent ID, so lookups, removals and edits
+    are dictionary hits instead of scans comparing (name, date, priority).
+
+    Reads and writes happen under file_lock (a FileLock shared by every running
+    instance), and before each write the store folds in whatever another
+    instance changed since this one last read or wrote the file.
+    """
+
+    def __init__(self, path, file_lock=None):
+        self.path = path
+        self.file_lock = file_lock or threading.RLock()
+        self.buckets = TaskBuckets([], date.today().toordinal())
+        self.by_id = {}     # task ID -> Task
+        self.by_name = {}   # task name -> set of task IDs
+        self.sort_cache = {}
+        self.batch = None   # records held back by an open transaction
+        self.undo = None    # how to revert each mutation of an open transaction
+        # Optional callable(writer) that defers whole-file saves, e.g. a PersistScheduler
+        self.defer_save = None
+        self.disk_signature = None
+        self.disk_rows = {}  # task ID -> row as last read from or written to the file
+        self.changes = set()  # IDs added, edited or removed since the last take_changes()
+        self.load()
+
+    @property
+    def tasks(self):
+        """All tasks in default order"""
+        return self.buckets.all()
+
+    @tasks.setter
+    def tasks(self, tasks):
+        self.buckets = TaskBuckets(tasks, date.today().toordinal())
+        self.by_id = {}
+        self.by_name = {}
+        for task in tasks:
+            self.index_task(task)
+        self.sort_cache.clear()
+
+    def index_task(self, task):
+        self.by_id[task.task_id] = task
+        self.by_name.setdefault(task.name, set()).add(task.task_id)
+
+    def unindex_task(self, task):
+        del self.by_id[task.task_id]
+        ids = self.by_name[task.name]
+        ids.discard(task.task_id)
+        if not ids:
+            del self.by_name[task.name]
+
+    def load(self):
+        """Read the task file once and keep it sorted in memory"""
+        with self.file_lock:
+            self.disk_signature = file_signature(self.path)
+            tasks, upgraded = self.read_sorted_snapshot()
+        self.tasks = tasks
+        self.disk_rows = rows_by_id(tasks)
+        if upgraded:
+            # One-time rewrite of a file from before tasks had IDs
+            self.save()
+
+    def watched_paths(self):
+        """Files another instance writes to when it changes these tasks"""
+        return [self.path]
+
+    def reload_external(self):
+        """Fold in changes another instance wrote to the task file
+
+        The file is compared against what this instance last read or wrote and
+        only tasks that changed there are applied; a task also changed here
+        keeps the local version. Returns True if anything changed.
+        """
+        with self.file_lock:
+            signature = file_signature(self.path)
+            if signature == self.disk_signature:
+                return False
+            disk_tasks, _ = self.read_sorted_snapshot()
+
+        disk = {task.task_id: task for task in disk_tasks}
+        disk_rows = rows_by_id(disk_tasks)
+        changed = False
+        for task_id in set(self.disk_rows) | set(disk_rows):
+            base_row = self.disk_rows.get(task_id)
+            if disk_rows.get(task_id) == base_row:
+                continue
+            mine = self.by_id.get(task_id)
+            if (tuple(mine.to_row()) if mine else None) != base_row:
+                continue
+            if mine is not None:
+                self.delete_task(task_id)
+            if task_id in disk:
+                self.insert_task(disk[task_id])
+            changed = True
+        self.disk_rows = disk_rows
+        self.disk_signature = signature
+        return changed
+
+    def read_sorted_snapshot(self):
+        """Parse and order the task file, vectorized through NumPy for large files
+
+        Returns (tasks, upgraded) where upgraded is True if any task needed a new ID.
+        """
+        import todo_columnar
+        if todo_columnar.use_columnar(self.path):
+            return todo_columnar.load_sorted_tasks(self.path)
+        tasks, upgraded = self.read_snapshot()
+        tasks.sort(key=task_sort_key)
+        return tasks, upgraded
+
+    def read_snapshot(self):
+        """Parse the task file, skipping header and malformed lines"""
+        tasks = []
+        upgraded = False
+        seen_ids = set()
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                for line in f:
+                    task, needed_id = parse_task_line(line, seen_ids)
+                    if task is not None:
+                        tasks.append(task)
+                        upgraded = upgraded or needed_id
+        return tasks, upgraded
+
+    def save(self):
+        """Write the in-memory task list back to disk, keeping other instances' changes"""
+        with self.file_lock:
+            self.reload_external()
+            tasks = self.tasks
+            atomic_write(self.path, "".join(" | ".join(task.to_row()) + "\n" for task in tasks))
+            self.disk_signature = file_signature(self.path)
+            self.disk_rows = rows_by_id(tasks)
+
+    def request_save(self):
+        """Save now, or through defer_save so rapid edits collapse into one write"""
+        if self.defer_save is None:
+            self.save()
+        else:
+            self.defer_save(self.save)
+
+    def persist(self, record):
+        """Persist a single mutation; the plain store rewrites the whole file"""
+        self.request_save()
+
+    def persist_batch(self, records):
+        """Persist the mutations of a committed transaction in one go"""
+        self.request_save()
+
+    def close(self):
+        """Flush anything pending before the store is dropped"""
+        pass
+
+    @contextmanager
+    def transaction(self):
+        """Group mutations so they are persisted once, or not at all
+
+        Inside the block every mutation is applied in memory as usual, so later
+        commands see earlier ones, but nothing is written. If the block raises,
+        all of its mutations are undone; otherwise they are persisted together.
+        Nested transactions join the outer one.
+        """
+        if self.batch is not None:
+            yield self
+            return
+        with self.file_lock:
+            self.reload_external()
+            self.batch, self.undo = [], []
+            changes = set(self.changes)
+            try:
+                yield self
+            except BaseException:
+                for revert in reversed(self.undo):
+                    revert()
+                self.changes = changes
+                self.batch = self.undo = None
+                raise
+            records = self.batch
+            self.batch = self.undo = None
+            if records:
+                self.persist_batch(records)
+
+    @contextmanager
+    def writing(self):
+        """Hold the file lock for one mutation, after catching up with other instances"""
+        with self.file_lock:
+            if self.batch is None:
+                self.reload_external()
+            yield
+
+    def record(self, record, revert):
+        """Persist a mutation now, or hold it back until the open transaction commits"""
+        if self.batch is None:
+            self.persist(record)
+        else:
+            self.batch.append(record)
+            self.undo.append(revert)
+
+    def all(self):
+        """Return a copy of all tasks in sorted order"""
+        return self.tasks
+
+    def get(self, task_id):
+        """Return the task with the given ID, or None"""
+        return self.by_id.get(task_id)
+
+    def ids_by_name(self, name):
+        """IDs of every task with the given name"""
+        return set(self.by_name.get(name, ()))
+
+    def find_by_name(self, name):
+        """Return the first task (in default order) with the given name, or None"""
+        ids = self.by_name.get(name)
+        if not ids:
+            return None
+        return min((self.by_id[task_id] for task_id in ids), key=task_sort_key)
+
+    def categorized(self, today):
+        """Split tasks into (overdue, due today, upcoming) lists in display order"""
+        buckets = self.buckets
+        buckets.roll_to(today.toordinal())
+        return list(buckets.overdue), list(buckets.today), list(buckets.upcoming)
+
+    def top(self, category, count, today):
+        """First count tasks of "overdue", "today" or "upcoming" without a full scan"""
+        self.buckets.roll_to(today.toordinal())
+        return self.buckets.top(category, count)
+
+    def next_transition(self, today):
+        """Ordinal of the next day on which any task changes category, or None
+
+        A task due today turns overdue tomorrow and an upcoming task turns into
+        a today task on its due date; overdue tasks never change again.
+        """
+        buckets = self.buckets
+        buckets.roll_to(today.toordinal())
+        if buckets.today:
+            return buckets.today_ordinal + 1
+        if buckets.upcoming:
+            return buckets.upcoming[0].due_ordinal
+        return None
+
+    def sorted_by(self, column, reverse=False):
+        """Return all tasks ordered by a Treeview column
+
+        Orders are cached per column and direction until the next mutation, and
+        toggling a header reuses the opposite direction instead of re-sorting.
+        The returned list is shared and must not be modified.
+        """
+        ordered = self.sort_cache.get((column, reverse))
+        if ordered is None:
+            opposite = self.sort_cache.get((column, not reverse))
+            if opposite is not None:
+                ordered = opposite[::-1]
+            else:
+                key = COLUMN_SORT_KEYS.get(column, COLUMN_SORT_KEYS["Task"])
+                ordered = sorted(self.tasks, key=key, reverse=reverse)
+            self.sort_cache[(column, reverse)] = ordered
+        return ordered
+
+    def __contains__(self, task):
+        return task_id_of(task) in self.by_id
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def add(self, task):
+        """Add a task, giving it a fresh ID if that ID is already taken"""
+        task = Task.coerce(task)
+        with self.writing():
+            if task.task_id in self.by_id:
+                task = Task(task.name, task.due_date, task.priority, task.due_ordinal)
+            self.insert_task(task)
+            self.changes.add(task.task_id)
+            self.record({"op": "add", "task": task.to_row()},
+                        lambda: self.delete_task(task.task_id))
+        return task
+
+    def remove(self, task):
+        """Remove a task (or task ID), raising ValueError if it is not in the store"""
+        with self.writing():
+            task = self.delete_task(task_id_of(task))
+            self.changes.add(task.task_id)
+            self.record({"op": "remove", "id": task.task_id},
+                        lambda: self.insert_task(task))
+        return task
+
+    def update(self, task):
+        """Replace the stored task that has the same ID, raising ValueError if there is none"""
+        task = Task.coerce(task)
+        with self.writing():
+            old_task = self.delete_task(task.task_id)
+            self.insert_task(task)
+            self.changes.add(task.task_id)
+
+            def revert():
+                self.delete_task(task.task_id)
+                self.insert_task(old_task)
+
+            self.record({"op": "update", "task": task.to_row()}, revert)
+        return task
+
+    def insert_task(self, task):
+        self.buckets.add(task)
+        self.index_task(task)
+        self.sort_cache.clear()
+
+    def delete_task(self, task_id):
+        task = self.by_id.get(task_id)
+        if task is None:
+            raise ValueError("Task not found")
+        self.buckets.remove(task)
+        self.unindex_task(task)
+        self.sort_cache.clear()
+        return task
+
+    def find_same(self, row):
+        """ID of a task with the same name, date and priority as row (old journal records)"""
+        target = Task.coerce(row[:3])
+        for task_id in self.by_name.get(target.name, ()):
+            if self.by_id[task_id].same_values(target):
+                return task_id
+        return None
+
+    def set_tasks(self, tasks):
+        """Replace the whole task list"""
+        unique = []
+        seen_ids = set()
+        for task in map(Task.coerce, tasks):
+            if task.task_id in seen_ids:
+                task = Task(task.name, task.due_date, task.priority, task.due_ordinal)
+            seen_ids.add(task.task_id)
+            unique.append(task)
+        unique.sort(key=task_sort_key)
+        # Only tasks that were added, removed or edited count as changes
+        new = {task.task_id: task for task in unique}
+        self.changes.update(task_id for task_id in self.by_id if task_id not in new)
+        self.changes.update(task_id for task_id, task in new.items()
+                            if task_id not in self.by_id or not self.by_id[task_id].same_values(task))
+        self.tasks = unique
+        self.request_save()
+
+    def take_changes(self):
+        """Return (tasks added or edited, IDs removed) since the last call, and reset tracking"""
+        changes, self.changes = self.changes, set()
+        upserts = [self.by_id[task_id] for task_id in changes if task_id in self.by_id]
+        removed = [task_id for task_id in changes if task_id not in self.by_id]
+        return upserts, removed
+
+    def mark_changed(self, task_ids):
+        """Track task IDs again, e.g. after a sync that failed"""
+        self.changes.update(task_ids)
+
+    def apply_record(self, record):
+        """Apply a journal record to memory without persisting it"""
+        op = record["op"]
+        if op == "add":
+            self.insert_task(Task.coerce(record["task"]))
+        elif op == "remove":
+            task_id = record["id"] if "id" in record else self.find_same(record["task"])
+            self.delete_task(task_id)
+        elif op == "update":
+            task = Task.coerce(record["task"])
+            self.delete_task(task.task_id)
+            self.insert_task(task)
+        elif op == "replace":
+            # Value-based record written before tasks had IDs
+            old_id = self.find_same(record["old"])
+            self.delete_task(old_id)
+            new = record["new"]
+            self.insert_task(Task(new[0], new[1], new[2], task_id=old_id))
+
+
+class JournaledTaskStore(TaskStore):
+    """Task store that appends one record per mutation instead of rewriting the file
+
+    The task file stays the snapshot (with a "#seq N" header line that the plain
+    parser ignores) and mutations go to an append-only journal next to it. Once
+    the journal passes JOURNAL_COMPACT_BYTES it is rotated and a background
+    thread folds it into a fresh snapshot.
+
+    Other instances' mutations are picked up by reading the journal from where
+    this instance last stopped; only when another instance rewrote the snapshot
+    (compaction, save or close) is everything reloaded.
+    """
+
+    def __init__(self, path, file_lock=None):
+        self.journal_path = path + ".journal"
+        self.old_journal_path = path + ".journal.old"
+        self.seq = 0
+        self.snapshot_seq = 0
+        self.snapshot_signature = None
+        self.journal = None
+        self.journal_ino = None
+        self.journal_offset = 0
+        self.compacting = False
+        super().__init__(path, file_lock)
+
+    def load(self):
+        """Load the snapshot and replay any journal records newer than it"""
+        with self.file_lock:
+            if self.journal is not None:
+                self.journal.close()
+            self.snapshot_signature = file_signature(self.path)
+            tasks, upgraded = self.read_sorted_snapshot()
+            self.tasks = tasks
+            self.seq = self.snapshot_seq = self.read_snapshot_seq()
+
+            for journal_path in (self.old_journal_path, self.journal_path):
+                records, self.journal_offset = self.read_journal(journal_path)
+                self.apply_records(records)
+
+            # Fold a leftover rotated journal (from a crash mid-compaction), or a
+            # snapshot that just had IDs assigned, right away
+            if upgraded or os.path.exists(self.old_journal_path) or self.journal_size() > JOURNAL_COMPACT_BYTES:
+                self.write_snapshot(list(self.tasks), self.seq)
+                if os.path.exists(self.old_journal_path):
+                    os.remove(self.old_journal_path)
+                # Truncate rather than delete: other instances may hold it open
+                open(self.journal_path, "w").close()
+                self.journal_offset = 0
+
+            self.open_journal()
+
+    def open_journal(self):
+        self.journal = open(self.journal_path, "a")
+        self.journal_ino = os.fstat(self.journal.fileno()).st_ino
+
+    def apply_records(self, records):
+        """Apply journal records newer than what is already in memory"""
+        for record in records:
+            if record["seq"] <= self.seq:
+                continue
+            try:
+                self.apply_record(record)
+            except ValueError:
+                print(f"Skipping journal record that no longer applies: {record}")
+            self.seq = record["seq"]
+
+    def watched_paths(self):
+        return [self.path, self.journal_path]
+
+    def reload_external(self):
+        """Apply journal records other instances appended since this one last looked
+
+        Returns True if anything changed.
+        """
+        with self.file_lock:
+            journal_signature = file_signature(self.journal_path)
+            if (file_signature(self.path) != self.snapshot_signature
+                    or journal_signature is None
+                    or journal_signature[2] != self.journal_ino
+                    or journal_signature[1] < self.journal_offset):
+                # Another instance rewrote the snapshot or rotated the journal
+                self.load()
+                return True
+            if journal_signature[1] == self.journal_offset:
+                return False
+            seq = self.seq
+            records, self.journal_offset = self.read_journal(self.journal_path, self.journal_offset)
+            self.apply_records(records)
+            return self.seq != seq
+
+    def read_snapshot_seq(self):
+        """Return the journal sequence number the snapshot already includes"""
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "r") as f:
+            first_line = f.readline().strip()
+        if first_line.startswith("#seq "):
+            try:
+                return int(first_line[5:])
+            except ValueError:
+                return 0
+        return 0
+
+    def read_journal(self, journal_path, offset=0):
+        """Read journal records from offset, truncating a torn trailing record left by a crash
+
+        Returns (records, offset just past the last complete record).
+        """
+        records = []
+        if not os.path.exists(journal_path):
+            return records, 0
+        good_offset = offset
+        with open(journal_path, "rb") as f:
+            f.seek(offset)
+            for raw_line in f:
+                if not raw_line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(raw_line))
+                except ValueError:
+                    break
+                good_offset += len(raw_line)
+        if good_offset < os.path.getsize(journal_path):
+            print(f"Discarding torn journal tail in {journal_path}")
+            with open(journal_path, "r+b") as f:
+                f.truncate(good_offset)
+        return records, good_offset
+
+    def journal_size(self):
+        try:
+            return os.path.getsize(self.journal_path)
+        except OSError:
+            return 0
+
+    def snapshot_text(self, tasks, seq):
+        return "".join([f"#seq {seq}\n"] + [" | ".join(task.to_row()) + "\n" for task in tasks])
+
+    def write_snapshot(self, tasks, seq):
+        atomic_write(self.path, self.snapshot_text(tasks, seq))
+        self.snapshot_seq = seq
+        self.snapshot_signature = file_signature(self.path)
+
+    def request_save(self):
+        """Snapshots are never deferred; the journal already keeps mutations cheap"""
+        self.save()
+
+    def persist(self, record):
+        """Append one compact record to the journal"""
+        self.persist_batch([record])
+
+    def persist_batch(self, records):
+        """Append a transaction's records to the journal with a single fsync"""
+        with self.file_lock:
+            lines = []
+            for record in records:
+                self.seq += 1
+                lines.append(json.dumps(dict(record, seq=self.seq), separators=(",", ":")) + "\n")
+            self.journal.write("".join(lines))
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            self.journal_offset = os.fstat(self.journal.fileno()).st_size
+            needs_compaction = not self.compacting and self.journal_offset > JOURNAL_COMPACT_BYTES
+        if needs_compaction:
+            self.compact()
+
+    def save(self):
+        """Write a full snapshot and start a fresh journal, keeping other instances' records"""
+        with self.file_lock:
+            self.reload_external()
+            self.write_snapshot(list(self.tasks), self.seq)
+            self.journal.close()
+            self.journal = open(self.journal_path, "w")
+            self.journal_ino = os.fstat(self.journal.fileno()).st_ino
+            self.journal_offset = 0
+            if os.path.exists(self.old_journal_path):
+                os.remove(self.old_journal_path)
+
+    def compact(self):
+        """Rotate the journal and fold it into the snapshot on a background thread"""
+        with self.file_lock:
+            self.reload_external()
+            if (self.compacting or os.path.exists(self.old_journal_path)
+                    or self.journal_size() <= JOURNAL_COMPACT_BYTES):
+                return
+            tasks = list(self.tasks)
+            seq = self.seq
+            self.journal.close()
+            try:
+                os.replace(self.journal_path, self.old_journal_path)
+            except OSError as e:
+                # e.g. another instance still has the journal open on Windows
+                print(f"Could not rotate task journal: {e}")
+                self.open_journal()
+                return
+            self.compacting = True
+            self.open_journal()
+            self.journal_offset = 0
+
+        def run():
+            try:
+                # Build and fsync the snapshot off the lock; only the rename is serialized
+                tmp_path = atomic_write(self.path, self.snapshot_text(tasks, seq),
+                                        tmp_suffix=".compact", replace=False)
+                with self.file_lock:
+                    # Another instance (or a save here) may have written a newer snapshot meanwhile
+                    if seq > max(self.snapshot_seq, self.read_snapshot_seq()):
+                        os.replace(tmp_path, self.path)
+                        self.snapshot_seq = seq
+                        self.snapshot_signature = file_signature(self.path)
+                    else:
+                        os.remove(tmp_path)
+                    if os.path.exists(self.old_journal_path):
+                        os.remove(self.old_journal_path)
+            except Exception as e:
+                print(f"Error compacting task journal: {e}")
+            finally:
+                self.compacting = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def close(self):
+        """Fold everything into the snapshot and empty the journal files"""
+        with self.file_lock:
+            self.reload_external()
+            self.write_snapshot(list(self.tasks), self.seq)
+            self.journal.close()
+            if os.path.exists(self.old_journal_path):
+                os.remove(self.old_journal_path)
+            # Truncate rather than delete: other instances may hold it open
+            open(self.journal_path, "w").close()
+
+
+class SQLiteTaskStore:
+    """Task store backed by a local SQLite database
+
+    Dates are stored as ISO yyyy-mm-dd text so that string order is date order,
+    and the overdue/today/upcoming split and column sorts run as indexed queries
+    instead of Python sorts. SQLite does its own cross-process locking, so
+    file_lock is accepted only for a uniform constructor.
+    """
+
+    ORDER_BY = {
+        "Task": "name",
+        "Due Date": "due_date",
+        "Priority": "priority",
+    }
+
+    def __init__(self, path, file_lock=None):
+        self.path = path
+        self.sort_cache = {}
+        self.changes = set()  # IDs added, edited or removed since the last take_changes()
+        self.in_transaction = False
+        # Reentrant so reads inside a transaction() block can take it again
+        self.lock = threading.RLock()
+        # The LAN share thread reads tasks too, so guard the connection with a lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                due_date TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                uid TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_due_priority ON tasks (due_date, priority DESC);
+            CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority);
+            CREATE INDEX IF NOT EXISTS idx_tasks_name ON tasks (name);
+        """)
+        self.migrate_task_ids()
+        self.conn.commit()
+        self.data_version = self.read_data_version()
+
+    def read_data_version(self):
+        with self.lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def watched_paths(self):
+        return [self.path, self.path + "-wal"]
+
+    def reload_external(self):
+        """Notice commits made by other instances; queries always read fresh rows
+
+        Returns True if another connection changed the database.
+        """
+        data_version = self.read_data_version()
+        if data_version == self.data_version:
+            return False
+        self.data_version = data_version
+        self.sort_cache.clear()
+        return True
+
+    def migrate_task_ids(self):
+        """Add the uid column to databases created before tasks had IDs and backfill it"""
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")]
+        if "uid" not in columns:
+            self.conn.execute("ALTER TABLE tasks ADD COLUMN uid TEXT")
+        missing = self.conn.execute("SELECT id FROM tasks WHERE uid IS NULL").fetchall()
+        self.conn.executemany("UPDATE tasks SET uid = ? WHERE id = ?",
+                              [(new_task_id(), row_id) for (row_id,) in missing])
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_uid ON tasks (uid)")
+
+    def query(self, sql, params=()):
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [Task.from_iso(name, due_date, priority, uid) for name, due_date, priority, uid in rows]
+
+    def execute(self, sql, params=()):
+        self.sort_cache.clear()
+        with self.lock:
+            if self.in_transaction:
+                return self.conn.execute(sql, params).rowcount
+            with self.conn:
+                return self.conn.execute(sql, params).rowcount
+
+    @contextmanager
+    def transaction(self):
+        """Group mutations into one SQLite transaction, rolled back if the block raises"""
+        if self.in_transaction:
+            yield self
+            return
+        with self.lock:
+            self.in_transaction = True
+            changes = set(self.changes)
+            try:
+                with self.conn:
+                    yield self
+            except BaseException:
+                self.changes = changes
+                raise
+            finally:
+                self.in_transaction = False
+                self.sort_cache.clear()
+
+    def all(self):
+        """Return all tasks in default order"""
+        return self.query("SELECT name, due_date, priority, uid FROM tasks ORDER BY due_date, priority DESC, id")
+
+    def find_by_name(self, name):
+        """Return the first task with the given name, or None"""
+        rows = self.query(
+            "SELECT name, due_date, priority, uid FROM tasks WHERE name = ? "
+            "ORDER BY due_date, priority DESC, id LIMIT 1",
+            (name,)
+        )
+        return rows[0] if rows else None
+
+    def categorized(self, today):
+        """Split tasks into (overdue, due today, upcoming) using the due date index"""
+        today_iso = today.isoformat()
+        overdue = self.query(
+            "SELECT name, due_date, priority, uid FROM tasks WHERE due_date < ? "
+            "ORDER BY due_date, priority DESC, id",
+            (today_iso,)
+        )
+        due_today = self.query(
+            "SELECT name, due_date, priority, uid FROM tasks WHERE due_date = ? "
+            "ORDER BY priority DESC, id",
+            (today_iso,)
+        )
+        upcoming = self.query(
+            "SELECT name, due_date, priority, uid FROM tasks WHERE due_date > ? "
+            "ORDER BY due_date, priority DESC, id",
+            (today_iso,)
+        )
+        return overdue, due_today, upcoming
+
+    def next_transition(self, today):
+        """Ordinal of the next day on which any task changes category, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT MIN(due_date) FROM tasks WHERE due_date >= ?", (today.isoformat(),)
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(date.fromisoformat(row[0]).toordinal(), today.toordinal() + 1)
+
+    def top(self, category, count, today):
+        """First count tasks of "overdue", "today" or "upcoming" via the due date index"""
+        condition = {"overdue": "<", "today": "=", "upcoming": ">"}[category]
+        return self.query(
+            f"SELECT name, due_date, priority, uid FROM tasks WHERE due_date {condition} ? "
+            f"ORDER BY due_date, priority DESC, id LIMIT ?",
+            (today.isoformat(), count)
+        )
+
+    def sorted_by(self, column, reverse=False):
+        """Return all tasks ordered by a Treeview column, cached until the next mutation"""
+        ordered = self.sort_cache.get((column, reverse))
+        if ordered is None:
+            opposite = self.sort_cache.get((column, not reverse))
+            if opposite is not None:
+                ordered = opposite[::-1]
+            else:
+                direction = "DESC" if reverse else "ASC"
+                ordered = self.query(
+                    f"SELECT name, due_date, priority, uid FROM tasks "
+                    f"ORDER BY {self.ORDER_BY.get(column, 'name')} {direction}, id"
+                )
+            self.sort_cache[(column, reverse)] = ordered
+        return ordered
+
+    def get(self, task_id):
+        """Return the task with the given ID, or None"""
+        rows = self.query("SELECT name, due_date, priority, uid FROM tasks WHERE uid = ?", (task_id,))
+        return rows[0] if rows else None
+
+    def ids_by_name(self, name):
+        """IDs of every task with the given name"""
+        with self.lock:
+            rows = self.conn.execute("SELECT uid FROM tasks WHERE name = ?", (name,)).fetchall()
+        return {uid for (uid,) in rows}
+
+    def __contains__(self, task):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM tasks WHERE uid = ?", (task_id_of(task),)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def add(self, task):
+        """Add a task, giving it a fresh ID if that ID is already taken"""
+        task = Task.coerce(task)
+        if task in self:
+            task = Task(task.name, task.due_date, task.priority, task.due_ordinal)
+        self.execute(
+            "INSERT INTO tasks (name, due_date, priority, uid) VALUES (?, ?, ?, ?)",
+            (task.name, task.iso_date, task.priority, task.task_id)
+        )
+        self.changes.add(task.task_id)
+        return task
+
+    def remove(self, task):
+        """Remove a task (or task ID), raising ValueError if it is not in the store"""
+        task_id = task_id_of(task)
+        if not self.execute("DELETE FROM tasks WHERE uid = ?", (task_id,)):
+            raise ValueError("Task not found")
+        self.changes.add(task_id)
+
+    def update(self, task):
+        """Replace the stored task that has the same ID, raising ValueError if there is none"""
+        task = Task.coerce(task)
+        updated = self.execute(
+            "UPDATE tasks SET name = ?, due_date = ?, priority = ? WHERE uid = ?",
+            (task.name, task.iso_date, task.priority, task.task_id)
+        )
+        if not updated:
+            raise ValueError("Task not found")
+        self.changes.add(task.task_id)
+        return task
+
+    def set_tasks(self, tasks):
+        """Replace the whole task list in one transaction"""
+        rows = []
+        seen_ids = set()
+        for task in map(Task.coerce, tasks):
+            task_id = task.task_id if task.task_id not in seen_ids else new_task_id()
+            seen_ids.add(task_id)
+            rows.append((task.name, task.iso_date, task.priority, task_id))
+        self.sort_cache.clear()
+        with self.lock, self.conn:
+            # Only tasks that were added, removed or edited count as changes
+            old = {uid: (name, due_date, priority) for name, due_date, priority, uid
+                   in self.conn.execute("SELECT name, due_date, priority, uid FROM tasks")}
+            new = {row[3]: row[:3] for row in rows}
+            self.changes.update(uid for uid in old if uid not in new)
+            self.changes.update(uid for uid, values in new.items() if old.get(uid) != values)
+            self.conn.execute("DELETE FROM tasks")
+            self.conn.executemany(
+                "INSERT INTO tasks (name, due_date, priority, uid) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def take_changes(self):
+        """Return (tasks added or edited, IDs removed) since the last call, and reset tracking"""
+        changes, self.changes = self.changes, set()
+        upserts = []
+        removed = []
+        for task_id in changes:
+            task = self.get(task_id)
+            if task is None:
+                removed.append(task_id)
+            else:
+                upserts.append(task)
+        return upserts, removed
+
+    def mark_changed(self, task_ids):
+        """Track task IDs again, e.g. after a sync that failed"""
+        self.changes.update(task_ids)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,235 @@
+import bisect
+
+
+def longest_increasing_run(keys, position):
+    """Return the set of keys forming a longest subsequence already in target order
+
+    keys is the current row order and position maps each key to its target
+    index. Rows in the returned set can stay where they are; only the others
+    need to be moved.
+    """
+    tails = []        # tails[k] = index into keys of the smallest tail of a run of length k+1
+    tail_positions = []
+    parents = [-1] * len(keys)
+    for i, key in enumerate(keys):
+        target = position[key]
+        k = bisect.bisect_left(tail_positions, target)
+        if k > 0:
+            parents[i] = tails[k - 1]
+        if k == len(tails):
+            tails.append(i)
+            tail_positions.append(target)
+        else:
+            tails[k] = i
+            tail_positions[k] = target
+
+    stable = set()
+    i = tails[-1] if tails else -1
+    while i != -1:
+        stable.add(keys[i])
+        i = parents[i]
+    return stable
+
+
+class TreeviewReconciler:
+    """Keeps a ttk.Treeview in line with an ordered list of rows using as few Tk calls as possible
+
+    Instead of deleting and re-inserting every row, each call diffs the new
+    rows against what the Treeview already shows and only inserts, deletes,
+    moves or re-tags the rows that changed, so the selection survives and
+    finishing one task touches one row.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.iids = {}   # row key -> Treeview item id
+        self.keys = {}   # Treeview item id -> row key
+        self.shown = {}  # row key -> (values, tags) currently displayed
+
+    def key_for(self, iid):
+        """Return the row key shown by a Treeview item"""
+        return self.keys.get(iid)
+
+    def reconcile(self, rows):
+        """Apply an ordered list of (key, values, tags) rows to the Treeview"""
+        tree = self.tree
+        wanted = {key: index for index, (key, _, _) in enumerate(rows)}
+
+        # Read back the real order so rows moved elsewhere (e.g. sorting) are accounted for
+        current = [self.keys[iid] for iid in tree.get_children("") if iid in self.keys]
+
+        # 1. Drop rows that are no longer wanted
+        stale = [key for key in current if key not in wanted]
+        if stale:
+            tree.delete(*[self.iids[key] for key in stale])
+            for key in stale:
+                del self.keys[self.iids.pop(key)]
+                del self.shown[key]
+            current = [key for key in current if key in wanted]
+
+        # 2. Rows on a longest already-ordered run stay put; the rest are detached
+        stable = longest_increasing_run(current, wanted)
+        moving = [self.iids[key] for key in current if key not in stable]
+        if moving:
+            tree.detach(*moving)
+
+        # 3. Walk the target order inserting new rows, re-attaching moved ones
+        #    and updating rows whose values or tags changed
+        for index, (key, values, tags) in enumerate(rows):
+            iid = self.iids.get(key)
+            if iid is None:
+                iid = tree.insert("", index, values=values, tags=tags, text=values[0])
+                self.iids[key] = iid
+                self.keys[iid] = key
+            else:
+                if key not in stable:
+                    tree.move(iid, "", index)
+                if self.shown[key] != (values, tags):
+                    tree.item(iid, values=values, tags=tags, text=values[0])
+            self.shown[key] = (values, tags)
+
+
+# Lists longer than this only materialize the rows around the visible window
+VIRTUAL_LIST_THRESHOLD = 2000
+OVERSCAN_ROWS = 10
+
+
+class TaskListView:
+    """Drives the task Treeview from an ordered row model
+
+    Short lists are shown in full. Once the model passes VIRTUAL_LIST_THRESHOLD
+    rows the view switches to a virtualized mode that only materializes the
+    visible window plus OVERSCAN_ROWS, scrolls by moving that window over the
+    model, and remembers the selection by row key so it survives scrolling.
+    """
+
+    def __init__(self, tree, scrollbar, row_height):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_height = row_height
+        self.reconciler = TreeviewReconciler(tree)
+        self.rows = []
+        self.index_of = {}
+        self.first = 0
+        self.virtual = False
+        self.selected = []
+
+        self.use_native_scrolling()
+        tree.bind("<<TreeviewSelect>>", self.on_select, add="+")
+        tree.bind("<Configure>", lambda event: self.virtual and self.render(), add="+")
+        tree.bind("<MouseWheel>", self.on_mousewheel, add="+")
+        tree.bind("<Button-4>", lambda event: self.scroll_rows(-3, event), add="+")
+        tree.bind("<Button-5>", lambda event: self.scroll_rows(3, event), add="+")
+        tree.bind("<Up>", lambda event: self.step_selection(-1), add="+")
+        tree.bind("<Down>", lambda event: self.step_selection(1), add="+")
+
+    def __len__(self):
+        return len(self.rows)
+
+    def use_native_scrolling(self):
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.configure(command=self.tree.yview)
+
+    def set_rows(self, rows):
+        """Show an ordered list of (key, values, tags) rows"""
+        self.rows = rows
+        virtual = len(rows) > VIRTUAL_LIST_THRESHOLD
+        if virtual != self.virtual:
+            self.virtual = virtual
+            if virtual:
+                self.tree.configure(yscrollcommand="")
+                self.scrollbar.configure(command=self.yview)
+            else:
+                self.use_native_scrolling()
+        if virtual:
+            self.index_of = {row[0]: i for i, row in enumerate(rows)}
+        else:
+            self.index_of = {}
+            self.first = 0
+        self.render()
+
+    def visible_count(self):
+        """Rows that fit below the heading"""
+        children = self.tree.get_children("")
+        bbox = self.tree.bbox(children[0]) if children else ""
+        # The first row starts below the heading; before it is drawn, reserve a row for the heading
+        heading = bbox[1] if bbox else self.row_height
+        return max(1, (self.tree.winfo_height() - heading) // self.row_height)
+
+    def render(self):
+        """Materialize the rows that should currently be in the Treeview"""
+        if not self.virtual:
+            self.reconciler.reconcile(self.rows)
+            return
+
+        count = self.visible_count()
+        self.first = max(0, min(self.first, len(self.rows) - count))
+        window = self.rows[self.first:self.first + count + OVERSCAN_ROWS]
+        self.reconciler.reconcile(window)
+        self.tree.yview_moveto(0)
+
+        # Restore the remembered selection for rows that are back in the window
+        iids = [self.reconciler.iids[key] for key in self.selected if key in self.reconciler.iids]
+        if iids and set(iids) != set(self.tree.selection()):
+            self.tree.selection_set(iids)
+
+        total = len(self.rows)
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + count) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def selection(self):
+        """Keys of the selected rows, including ones scrolled out of the window"""
+        if not self.virtual:
+            return [self.reconciler.key_for(iid) for iid in self.tree.selection()]
+        return [key for key in self.selected if key in self.index_of]
+
+    def on_select(self, event):
+        if not self.virtual:
+            return
+        keys = [self.reconciler.key_for(iid) for iid in self.tree.selection()]
+        if keys:
+            self.selected = keys
+        elif any(key in self.reconciler.iids for key in self.selected):
+            # The user cleared a selection that is still on screen
+            self.selected = []
+        # Otherwise the selected row just scrolled out of the window; keep it
+
+    def yview(self, *args):
+        """Scrollbar command in virtualized mode"""
+        count = self.visible_count()
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            step = count if args[2] == "pages" else 1
+            self.first += int(args[1]) * step
+        self.render()
+
+    def on_mousewheel(self, event):
+        return self.scroll_rows(-3 if event.delta > 0 else 3, event)
+
+    def scroll_rows(self, delta, event=None):
+        if not self.virtual:
+            return None
+        self.first += delta
+        self.render()
+        return "break"
+
+    def step_selection(self, delta):
+        """Keyboard navigation that can walk past the materialized window"""
+        if not self.virtual or not self.selected:
+            return None
+        index = self.index_of.get(self.selected[0])
+        if index is None:
+            return None
+        index = max(0, min(index + delta, len(self.rows) - 1))
+        self.selected = [self.rows[index][0]]
+        count = self.visible_count()
+        if index < self.first:
+            self.first = index
+        elif index >= self.first + count:
+            self.first = index - count + 1
+        self.render()
+        self.tree.focus(self.reconciler.iids[self.selected[0]])
+        return "break"
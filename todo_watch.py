@@ -0,0 +1,81 @@
+import os
+
+from todo_store import file_signature
+
+try:
+    # watchdog uses inotify on Linux and ReadDirectoryChangesW on Windows
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    # Without watchdog the watched files are polled instead
+    Observer = None
+    FileSystemEventHandler = object
+
+# How often watched files are stat'ed when watchdog is not installed
+WATCH_POLL_MS = 1000
+
+
+class DataFileEvents(FileSystemEventHandler):
+    """Forwards watchdog events for watched files to the Tk thread"""
+
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path and os.path.abspath(path) in self.watcher.signatures:
+                self.watcher.root.after(0, self.watcher.check, os.path.abspath(path))
+
+
+class FileWatcher:
+    """Calls callback(path) on the Tk thread when a watched file changes on disk
+
+    Notifications come from the OS through watchdog when it is installed and
+    from polling every WATCH_POLL_MS otherwise. Either way a change is only
+    reported once the file's (mtime, size, inode) signature differs from the
+    last one seen, so bursts of events for one write collapse into one call.
+    """
+
+    def __init__(self, root, callback):
+        self.root = root
+        self.callback = callback
+        self.signatures = {}  # absolute path -> last seen signature
+        self.observer = None
+        self.watched_dirs = set()
+        self.poll_timer = None
+        if Observer is not None:
+            self.observer = Observer()
+            self.observer.daemon = True
+            self.observer.start()
+        else:
+            self.poll_timer = self.root.after(WATCH_POLL_MS, self.poll)
+
+    def watch(self, paths):
+        """Replace the set of watched files"""
+        self.signatures = {os.path.abspath(path): file_signature(path) for path in paths}
+        if self.observer is None:
+            return
+        for directory in {os.path.dirname(path) for path in self.signatures} - self.watched_dirs:
+            self.observer.schedule(DataFileEvents(self), directory, recursive=False)
+            self.watched_dirs.add(directory)
+
+    def check(self, path):
+        """Report path if its signature changed since it was last seen"""
+        if path not in self.signatures:
+            return
+        signature = file_signature(path)
+        if signature != self.signatures[path]:
+            self.signatures[path] = signature
+            self.callback(path)
+
+    def poll(self):
+        for path in list(self.signatures):
+            self.check(path)
+        self.poll_timer = self.root.after(WATCH_POLL_MS, self.poll)
+
+    def stop(self):
+        if self.observer is not None:
+            self.observer.stop()
+        if self.poll_timer is not None:
+            self.root.after_cancel(self.poll_timer)
+            self.poll_timer = None